@@ -0,0 +1,101 @@
+"""
+Caché de respuestas y GET condicional para las rutas de lectura de la API.
+
+Cada entrada guarda el cuerpo JSON ya serializado junto con la versión de los
+datos con la que se generó (catálogo de auditorios y/o eventos del auditorio).
+Mientras la versión no cambie y la entrada no expire, la respuesta se sirve
+desde memoria y las peticiones con If-None-Match / If-Modified-Since reciben
+304 sin consultar la base.
+
+El ETag es un hash del contenido, por lo que sigue siendo válido entre
+reinicios y entre procesos; el TTL acota cuánto tarda en verse un cambio hecho
+por otro proceso (por ejemplo, una reserva desde el bot).
+"""
+import hashlib
+import os
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from database.cache import TTLCache
+from database.metrics import REGISTRO
+
+CACHE_RESPUESTAS = REGISTRO.contador(
+    'auditorios_api_cache_respuestas_total',
+    'Respuestas de la API servidas desde la caché o regeneradas',
+    ('ruta', 'resultado')
+)
+
+class Entrada:
+    __slots__ = ('version', 'cuerpo', 'etag', 'modificado')
+    
+    def __init__(self, version, cuerpo: bytes, etag: str, modificado: float):
+        self.version = version
+        self.cuerpo = cuerpo
+        self.etag = etag
+        self.modificado = modificado
+
+def _coincide_etag(cabecera: str, etag: str) -> bool:
+    etiquetas = [e.strip() for e in cabecera.split(',')]
+    return '*' in etiquetas or any((e[2:] if e.startswith('W/') else e) == etag for e in etiquetas)
+
+def _no_modificado(request: Request, entrada: Entrada) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        return _coincide_etag(if_none_match, entrada.etag)
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            return int(entrada.modificado) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+class CacheRespuestas:
+    def __init__(self, ttl: float = 15, max_entries: int = 2048):
+        self.cache = TTLCache(ttl=ttl, max_entries=max_entries)
+        self._adaptadores = {}
+    
+    def _serializar(self, tipo, datos) -> bytes:
+        adaptador = self._adaptadores.get(tipo)
+        if adaptador is None:
+            adaptador = self._adaptadores[tipo] = TypeAdapter(tipo)
+        return adaptador.dump_json(datos)
+    
+    def _respuesta(self, request: Request, entrada: Entrada) -> Response:
+        cabeceras = {
+            'ETag': entrada.etag,
+            'Last-Modified': formatdate(entrada.modificado, usegmt=True),
+            'Cache-Control': 'no-cache'
+        }
+        if _no_modificado(request, entrada):
+            return Response(status_code=304, headers=cabeceras)
+        return Response(content=entrada.cuerpo, media_type='application/json', headers=cabeceras)
+    
+    async def responder(self, request: Request, ruta: str, clave, version, tipo, producir) -> Response:
+        """
+        Servir `clave` desde la caché si su versión sigue vigente; si no, llamar
+        a `producir()` (que puede lanzar HTTPException), serializar con `tipo` y guardar.
+        """
+        entrada = self.cache.get(clave)
+        if entrada is not None and entrada.version == version:
+            CACHE_RESPUESTAS.incrementar(ruta, 'hit')
+            return self._respuesta(request, entrada)
+        
+        CACHE_RESPUESTAS.incrementar(ruta, 'miss')
+        cuerpo = self._serializar(tipo, await producir())
+        etag = '"' + hashlib.sha1(cuerpo).hexdigest()[:20] + '"'
+        # Si el contenido no cambió, conservar la fecha de modificación anterior
+        modificado = entrada.modificado if entrada is not None and entrada.etag == etag else time.time()
+        entrada = Entrada(version, cuerpo, etag, modificado)
+        self.cache.set(clave, entrada)
+        return self._respuesta(request, entrada)
+    
+    def info(self):
+        return self.cache.info()
+
+def crear_cache_respuestas() -> CacheRespuestas:
+    return CacheRespuestas(
+        ttl=float(os.getenv('RESPUESTAS_CACHE_TTL', '15')),
+        max_entries=int(os.getenv('RESPUESTAS_CACHE_MAX', '2048'))
+    )
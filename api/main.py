@@ -1,9 +1,15 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import datetime, date
+import time
+from datetime import datetime, date, timedelta
 from typing import List, Optional
-from database.repositories import UsuarioRepository, AuditorioRepository, EventoRepository
-from database.models import Auditorio, Evento, Usuario
+from database.async_repositories import AsyncUsuarioRepository, AsyncAuditorioRepository, AsyncEventoRepository
+from database.connection import DatabaseConnection
+from database import metrics, tracing
+from api.cache_respuestas import crear_cache_respuestas
+from database.repositories import AuditorioRepository, EventoRepository, decodificar_cursor
+from database.models import (Auditorio, Evento, PaginaEventos, Usuario, HorarioLibre, ResultadoLote,
+                             SerieEventos, ResultadoSerie)
 
 app = FastAPI(title="API de Auditorios", version="1.0.0")
 
@@ -16,37 +22,103 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Repositorios
-usuario_repo = UsuarioRepository()
-auditorio_repo = AuditorioRepository()
-evento_repo = EventoRepository()
+@app.middleware("http")
+async def medir_peticiones(request: Request, call_next):
+    """Registrar la duración de cada petición etiquetada con la plantilla de la ruta"""
+    inicio = time.perf_counter()
+    estado = 500
+    try:
+        with tracing.origen(f"api:{request.method} {request.url.path}"):
+            response = await call_next(request)
+        estado = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        ruta = route.path if route is not None else "desconocida"
+        metrics.API_PETICIONES.observar(time.perf_counter() - inicio, request.method, ruta, estado)
+
+# Repositorios (las consultas se ejecutan en el executor acotado de base de datos,
+# el límite de concurrencia se configura con DB_EXECUTOR_WORKERS)
+usuario_repo = AsyncUsuarioRepository()
+auditorio_repo = AsyncAuditorioRepository()
+evento_repo = AsyncEventoRepository()
+# Respuestas serializadas de las rutas de lectura, invalidadas por versión de los datos
+cache_respuestas = crear_cache_respuestas()
+
+MAX_DIAS_DISPONIBILIDAD = 31
+MAX_LIMITE_PAGINA = 100
+MAX_EVENTOS_LOTE = 1000
 
 @app.get("/")
 async def root():
     return {"message": "API de Reservas de Auditorios"}
 
 @app.get("/auditorios", response_model=List[Auditorio])
-async def obtener_auditorios():
+async def obtener_auditorios(request: Request):
     """Obtener todos los auditorios disponibles"""
-    return auditorio_repo.obtener_auditorios()
+    return await cache_respuestas.responder(
+        request, "/auditorios", ("auditorios",), auditorio_repo.version_catalogo,
+        List[Auditorio], auditorio_repo.obtener_auditorios
+    )
 
-@app.get("/auditorios/{auditorio_id}", response_model=Auditorio)
-async def obtener_auditorio(auditorio_id: int):
-    """Obtener un auditorio específico"""
-    auditorio = auditorio_repo.obtener_auditorio(auditorio_id)
+async def buscar_auditorio(auditorio_id: int) -> Auditorio:
+    auditorio = await auditorio_repo.obtener_auditorio(auditorio_id)
     if not auditorio:
         raise HTTPException(status_code=404, detail="Auditorio no encontrado")
     return auditorio
 
-@app.get("/auditorios/{auditorio_id}/eventos")
-async def obtener_eventos_auditorio(auditorio_id: int, fecha: Optional[date] = None):
-    """Obtener eventos de un auditorio"""
-    auditorio = auditorio_repo.obtener_auditorio(auditorio_id)
-    if not auditorio:
-        raise HTTPException(status_code=404, detail="Auditorio no encontrado")
+@app.get("/auditorios/{auditorio_id}", response_model=Auditorio)
+async def obtener_auditorio(auditorio_id: int, request: Request):
+    """Obtener un auditorio específico"""
+    return await cache_respuestas.responder(
+        request, "/auditorios/{auditorio_id}", ("auditorio", auditorio_id), auditorio_repo.version_catalogo,
+        Auditorio, lambda: buscar_auditorio(auditorio_id)
+    )
+
+def parametros_cursor(
+    limite: int = Query(20, ge=1, le=MAX_LIMITE_PAGINA),
+    cursor: Optional[str] = None,
+    direccion: str = Query("siguiente", pattern="^(siguiente|anterior)$")
+) -> dict:
+    """Parámetros comunes de paginación por cursor"""
+    if cursor:
+        try:
+            decodificar_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+    return {"limite": limite, "cursor": cursor, "direccion": direccion}
+
+def parametros_pagina(incluir_pasados: bool = False, paginacion: dict = Depends(parametros_cursor)) -> dict:
+    """Paginación de los listados de eventos vigentes"""
+    return {**paginacion, "incluir_pasados": incluir_pasados}
+
+@app.get("/auditorios/{auditorio_id}/eventos", response_model=PaginaEventos)
+async def obtener_eventos_auditorio(
+    auditorio_id: int,
+    request: Request,
+    fecha: Optional[date] = None,
+    pagina: dict = Depends(parametros_pagina)
+):
+    """Obtener eventos de un auditorio (por defecto solo los futuros, paginados)"""
+    async def producir():
+        await buscar_auditorio(auditorio_id)
+        return await evento_repo.listar_eventos_auditorio(auditorio_id, fecha=fecha, **pagina)
     
-    eventos = evento_repo.obtener_eventos_auditorio(auditorio_id, fecha)
-    return eventos
+    clave = ("eventos", auditorio_id, fecha, *pagina.values())
+    if not pagina["incluir_pasados"]:
+        # El filtro de eventos vigentes depende de la hora: la clave cambia cada minuto
+        # para que una respuesta guardada no siga mostrando eventos ya terminados
+        clave += (datetime.now().replace(second=0, microsecond=0),)
+    version = (auditorio_repo.version_catalogo, evento_repo.version_eventos(auditorio_id))
+    return await cache_respuestas.responder(
+        request, "/auditorios/{auditorio_id}/eventos", clave, version, PaginaEventos, producir
+    )
+
+@app.get("/auditorios/{auditorio_id}/historial", response_model=PaginaEventos)
+async def obtener_historial_auditorio(auditorio_id: int, pagina: dict = Depends(parametros_cursor)):
+    """Eventos archivados (pasados y cancelados) de un auditorio, del más reciente al más antiguo"""
+    await buscar_auditorio(auditorio_id)
+    return await evento_repo.listar_historial_auditorio(auditorio_id, **pagina)
 
 @app.get("/auditorios/{auditorio_id}/disponibilidad")
 async def verificar_disponibilidad(
@@ -56,7 +128,7 @@ async def verificar_disponibilidad(
     hora_fin: str
 ):
     """Verificar disponibilidad de un auditorio"""
-    auditorio = auditorio_repo.obtener_auditorio(auditorio_id)
+    auditorio = await auditorio_repo.obtener_auditorio(auditorio_id)
     if not auditorio:
         raise HTTPException(status_code=404, detail="Auditorio no encontrado")
     
@@ -64,40 +136,116 @@ async def verificar_disponibilidad(
         inicio = datetime.strptime(hora_inicio, "%H:%M")
         fin = datetime.strptime(hora_fin, "%H:%M")
         
-        disponible = evento_repo.verificar_disponibilidad(auditorio_id, fecha, inicio, fin)
+        disponible = await evento_repo.verificar_disponibilidad(auditorio_id, fecha, inicio, fin)
         return {"disponible": disponible}
     except ValueError:
         raise HTTPException(status_code=400, detail="Formato de hora inválido. Use HH:MM")
 
-@app.get("/usuarios/{telegram_id}/eventos")
-async def obtener_eventos_usuario(telegram_id: int):
-    """Obtener eventos de un usuario específico"""
-    eventos = evento_repo.obtener_eventos_usuario(telegram_id)
-    return eventos
+@app.get("/disponibilidad", response_model=List[HorarioLibre])
+async def obtener_horarios_libres(
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    duracion_minima: int = 0
+):
+    """Ventanas libres de todos los auditorios en un rango de fechas (por defecto, esta semana)"""
+    desde = desde or date.today()
+    hasta = hasta or desde + timedelta(days=6)
+    if hasta < desde:
+        raise HTTPException(status_code=400, detail="La fecha 'hasta' debe ser posterior a 'desde'")
+    if (hasta - desde).days >= MAX_DIAS_DISPONIBILIDAD:
+        raise HTTPException(status_code=400, detail=f"El rango máximo es de {MAX_DIAS_DISPONIBILIDAD} días")
+    if duracion_minima < 0:
+        raise HTTPException(status_code=400, detail="La duración mínima no puede ser negativa")
+    
+    return await evento_repo.obtener_horarios_libres(desde, hasta, duracion_minima)
+
+@app.get("/usuarios/{telegram_id}/eventos", response_model=PaginaEventos)
+async def obtener_eventos_usuario(telegram_id: int, pagina: dict = Depends(parametros_pagina)):
+    """Obtener eventos de un usuario específico (por defecto solo los futuros, paginados)"""
+    return await evento_repo.listar_eventos_usuario(telegram_id, **pagina)
+
+@app.get("/usuarios/{telegram_id}/historial", response_model=PaginaEventos)
+async def obtener_historial_usuario(telegram_id: int, pagina: dict = Depends(parametros_cursor)):
+    """Eventos archivados (pasados y cancelados) de un usuario, del más reciente al más antiguo"""
+    return await evento_repo.listar_historial_usuario(telegram_id, **pagina)
 
 @app.post("/eventos")
 async def crear_evento(evento: Evento):
     """Crear un nuevo evento/reserva"""
-    # Verificar disponibilidad
-    disponible = evento_repo.verificar_disponibilidad(
-        evento.auditorio_id,
-        evento.fecha.date(),
-        evento.hora_inicio,
-        evento.hora_fin
-    )
+    resultado = await evento_repo.reservar(evento)
     
-    if not disponible:
-        raise HTTPException(status_code=409, detail="Conflicto de horarios")
-    
-    if evento_repo.crear_evento(evento):
-        return {"message": "Evento creado exitosamente"}
-    else:
+    if resultado.estado == "invalido":
+        raise HTTPException(status_code=400, detail="La hora de fin debe ser posterior a la de inicio")
+    if resultado.estado == "conflicto":
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "mensaje": "Conflicto de horarios",
+                "conflictos": [c.model_dump(mode="json") for c in resultado.conflictos]
+            }
+        )
+    if resultado.estado == "auditorio_no_encontrado":
+        raise HTTPException(status_code=404, detail="Auditorio no encontrado")
+    if not resultado.exito:
         raise HTTPException(status_code=500, detail="Error al crear el evento")
+    
+    return {"message": "Evento creado exitosamente", "evento_id": resultado.evento_id}
+
+@app.post("/eventos/batch", response_model=ResultadoLote)
+async def crear_eventos_lote(eventos: List[Evento]):
+    """Reservar varios eventos en una transacción, con un resultado por evento"""
+    if not eventos:
+        raise HTTPException(status_code=400, detail="El lote está vacío")
+    if len(eventos) > MAX_EVENTOS_LOTE:
+        raise HTTPException(status_code=400, detail=f"El lote admite como máximo {MAX_EVENTOS_LOTE} eventos")
+    
+    resultados = await evento_repo.reservar_lote(eventos)
+    reservados = sum(1 for r in resultados if r.exito)
+    return ResultadoLote(reservados=reservados, rechazados=len(resultados) - reservados, resultados=resultados)
+
+@app.post("/series", response_model=ResultadoSerie)
+async def crear_serie(serie: SerieEventos):
+    """Reservar un evento recurrente (semanal o quincenal) hasta una fecha"""
+    try:
+        resultado = await evento_repo.reservar_serie(serie)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if resultado.reservados == 0:
+        estados = {r.estado for r in resultado.resultados}
+        if "error" in estados:
+            raise HTTPException(status_code=500, detail="Error al crear la serie")
+        raise HTTPException(status_code=409, detail=resultado.model_dump(mode="json"))
+    return resultado
+
+@app.delete("/series/{serie_id}")
+async def cancelar_serie(serie_id: int, telegram_id: int):
+    """Cancelar todas las ocurrencias futuras de una serie"""
+    cancelados = await evento_repo.cancelar_serie(serie_id, telegram_id)
+    if not cancelados:
+        raise HTTPException(status_code=404, detail="Serie no encontrada o no tienes permisos")
+    return {"message": "Serie cancelada exitosamente", "cancelados": cancelados}
+
+@app.get("/estadisticas")
+async def obtener_estadisticas():
+    """Estado del pool de conexiones, la caché del catálogo y el índice de disponibilidad"""
+    indice = EventoRepository.indice
+    return {
+        "pool": DatabaseConnection.get_pool().status(),
+        "cache_catalogo": AuditorioRepository.cache.info(),
+        "cache_respuestas": cache_respuestas.info(),
+        "indice_disponibilidad": indice.info() if indice is not None else None
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def exportar_metricas():
+    """Métricas en formato de texto de Prometheus"""
+    return Response(content=metrics.REGISTRO.exportar(), media_type=metrics.CONTENT_TYPE)
 
 @app.delete("/eventos/{evento_id}")
 async def cancelar_evento(evento_id: int, telegram_id: int):
     """Cancelar un evento"""
-    if evento_repo.cancelar_evento(evento_id, telegram_id):
+    if await evento_repo.cancelar_evento(evento_id, telegram_id):
         return {"message": "Evento cancelado exitosamente"}
     else:
         raise HTTPException(status_code=404, detail="Evento no encontrado o no tienes permisos")
@@ -0,0 +1,121 @@
+"""
+Benchmark de /auditorios/{id}/disponibilidad bajo carga concurrente.
+
+Compara la ruta actual de api/main.py (consultas en el executor de base de datos)
+con la versión anterior, que llamaba a los repositorios bloqueantes dentro del
+event loop.
+
+Por defecto simula la latencia de MySQL con --latencia para poder ejecutarse sin
+base de datos; con --real usa la base configurada en .env.
+
+Uso:
+    python benchmarks/bench_api_disponibilidad.py --peticiones 400 --concurrencia 32
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from database.models import Auditorio
+from database.repositories import AuditorioRepository, EventoRepository
+
+def simular_latencia(segundos):
+    """Sustituye las consultas usadas por la ruta por esperas bloqueantes"""
+    auditorio = Auditorio(id=1, nombre="Auditorio Central", capacidad=200, ubicacion="Edificio Principal")
+
+    def obtener_auditorio(self, auditorio_id):
+        time.sleep(segundos)
+        return auditorio
+
+    def verificar_disponibilidad(self, auditorio_id, fecha, hora_inicio, hora_fin):
+        time.sleep(segundos)
+        return True
+
+    AuditorioRepository.obtener_auditorio = obtener_auditorio
+    EventoRepository.verificar_disponibilidad = verificar_disponibilidad
+
+def crear_app_bloqueante():
+    """Réplica de la ruta antes del cambio: consultas síncronas dentro de async def"""
+    app = FastAPI()
+    auditorio_repo = AuditorioRepository()
+    evento_repo = EventoRepository()
+
+    @app.get("/auditorios/{auditorio_id}/disponibilidad")
+    async def verificar_disponibilidad(auditorio_id: int, fecha: date, hora_inicio: str, hora_fin: str):
+        auditorio = auditorio_repo.obtener_auditorio(auditorio_id)
+        if not auditorio:
+            raise HTTPException(status_code=404, detail="Auditorio no encontrado")
+        inicio = datetime.strptime(hora_inicio, "%H:%M")
+        fin = datetime.strptime(hora_fin, "%H:%M")
+        return {"disponible": evento_repo.verificar_disponibilidad(auditorio_id, fecha, inicio, fin)}
+
+    return app
+
+def servir(app, puerto):
+    config = uvicorn.Config(app, host="127.0.0.1", port=puerto, log_level="warning")
+    server = uvicorn.Server(config)
+    hilo = threading.Thread(target=server.run, daemon=True)
+    hilo.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, hilo
+
+def medir(puerto, peticiones, concurrencia, auditorio_id):
+    url = (f"http://127.0.0.1:{puerto}/auditorios/{auditorio_id}/disponibilidad"
+           f"?fecha={date.today().isoformat()}&hora_inicio=10:00&hora_fin=11:00")
+
+    def una(_):
+        inicio = time.perf_counter()
+        with urllib.request.urlopen(url) as resp:
+            resp.read()
+        return time.perf_counter() - inicio
+
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        list(pool.map(una, range(concurrencia)))  # calentamiento
+        inicio = time.perf_counter()
+        latencias = sorted(pool.map(una, range(peticiones)))
+        total = time.perf_counter() - inicio
+
+    return {
+        'rps': peticiones / total,
+        'p50_ms': latencias[len(latencias) // 2] * 1000,
+        'p99_ms': latencias[int(len(latencias) * 0.99) - 1] * 1000
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--peticiones', type=int, default=400)
+    parser.add_argument('--concurrencia', type=int, default=32)
+    parser.add_argument('--latencia', type=float, default=0.01, help="latencia simulada por consulta (s)")
+    parser.add_argument('--real', action='store_true', help="usar la base de datos configurada en .env")
+    parser.add_argument('--auditorio', type=int, default=1)
+    parser.add_argument('--puerto', type=int, default=8765)
+    args = parser.parse_args()
+
+    if not args.real:
+        simular_latencia(args.latencia)
+
+    from api.main import app as app_actual
+
+    resultados = {}
+    for nombre, app, puerto in (("antes (bloqueante)", crear_app_bloqueante(), args.puerto),
+                                ("después (executor)", app_actual, args.puerto + 1)):
+        server, hilo = servir(app, puerto)
+        resultados[nombre] = medir(puerto, args.peticiones, args.concurrencia, args.auditorio)
+        server.should_exit = True
+        hilo.join()
+
+    print(f"{'variante':<22}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<22}{r['rps']:>10.1f}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Microbenchmark del coste por fila al convertir resultados de eventos y auditorios.
+
+Compara el camino anterior (cursor de diccionarios, closure to_time por fila y
+validación completa de pydantic) con database/decoding.py (tuplas,
+desempaquetado por posición y construcción del modelo asignando directamente
+__dict__ y los atributos internos de pydantic, sin validar). No necesita base de datos.
+
+Uso:
+    python benchmarks/bench_decodificacion.py --filas 20000
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.models import Auditorio, EventoDetalle
+from database.decoding import fila_a_evento_detalle, fila_a_auditorio
+
+COLUMNAS = ['id', 'auditorio_id', 'usuario_telegram_id', 'nombre_evento', 'fecha', 'hora_inicio',
+            'hora_fin', 'descripcion', 'estado', 'created_at', 'auditorio_nombre', 'usuario_nombre']
+
+def generar_filas(n):
+    base = date(2024, 1, 1)
+    creado = datetime(2023, 12, 1, 9, 0)
+    return [
+        (i, i % 40 + 1, 100000 + i % 500, f"Evento {i}", base + timedelta(days=i % 365),
+         timedelta(hours=8 + i % 10), timedelta(hours=9 + i % 10, minutes=30),
+         "Descripción del evento", "reservado", creado, "Auditorio Central", "Usuario")
+        for i in range(n)
+    ]
+
+def decodificar_evento_anterior(row):
+    fecha = row['fecha']
+    hora_inicio = row['hora_inicio']
+    hora_fin = row['hora_fin']
+    def to_time(val):
+        if isinstance(val, timedelta):
+            return (datetime.min + val).time()
+        elif isinstance(val, datetime):
+            return val.time()
+        return val
+    hora_inicio = to_time(hora_inicio)
+    hora_fin = to_time(hora_fin)
+    return EventoDetalle(**{
+        'id': row['id'],
+        'auditorio_id': row['auditorio_id'],
+        'usuario_telegram_id': row['usuario_telegram_id'],
+        'nombre_evento': row['nombre_evento'],
+        'fecha': datetime.combine(fecha, datetime.min.time()),
+        'hora_inicio': datetime.combine(fecha, hora_inicio),
+        'hora_fin': datetime.combine(fecha, hora_fin),
+        'descripcion': row['descripcion'],
+        'estado': row['estado'],
+        'created_at': row['created_at'],
+        'auditorio_nombre': row['auditorio_nombre'],
+        'usuario_nombre': row['usuario_nombre']
+    })
+
+def medir(func, filas, repeticiones):
+    mejor = min(timeit.repeat(lambda: [func(f) for f in filas], number=1, repeat=repeticiones))
+    return mejor / len(filas) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=20000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    tuplas = generar_filas(args.filas)
+    dicts = [dict(zip(COLUMNAS, t)) for t in tuplas]
+
+    # Comprobar que ambos caminos producen el mismo resultado
+    assert decodificar_evento_anterior(dicts[0]).model_dump() == fila_a_evento_detalle(tuplas[0]).model_dump()
+
+    auditorios_t = [(i, f"Auditorio {i}", 100, "Edificio", None, 1) for i in range(args.filas)]
+    auditorios_d = [dict(zip(['id', 'nombre', 'capacidad', 'ubicacion', 'descripcion', 'activo'], t)) for t in auditorios_t]
+
+    resultados = [
+        ("evento (anterior)", medir(decodificar_evento_anterior, dicts, args.repeticiones)),
+        ("evento (rápido)", medir(fila_a_evento_detalle, tuplas, args.repeticiones)),
+        ("auditorio (anterior)", medir(lambda row: Auditorio(**row), auditorios_d, args.repeticiones)),
+        ("auditorio (rápido)", medir(fila_a_auditorio, auditorios_t, args.repeticiones)),
+    ]
+
+    print(f"{'camino':<24}{'µs/fila':>10}")
+    for nombre, us in resultados:
+        print(f"{nombre:<24}{us:>10.2f}")
+
+if __name__ == "__main__":
+    main()
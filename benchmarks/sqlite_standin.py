@@ -0,0 +1,231 @@
+"""
+Sustituto local de MySQL para los benchmarks: SQLite con la interfaz mínima de
+mysql.connector que usan los repositorios.
+
+Las consultas se traducen de forma superficial (%s -> ?, sin FOR UPDATE ni
+FROM DUAL, CURDATE() como DATE('now')) y las columnas TIME se devuelven como timedelta, igual que
+mysql.connector. start_transaction usa BEGIN IMMEDIATE, que serializa las
+escrituras como lo hace el bloqueo de fila en MySQL.
+"""
+import random
+import sqlite3
+import threading
+from datetime import date, datetime, time, timedelta
+
+def _time_desde_sqlite(valor: bytes) -> timedelta:
+    h, m, s = (int(x) for x in valor.decode().split(':'))
+    return timedelta(hours=h, minutes=m, seconds=s)
+
+sqlite3.register_adapter(time, lambda t: t.strftime('%H:%M:%S'))
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+sqlite3.register_adapter(datetime, lambda d: d.isoformat(' '))
+sqlite3.register_converter('TIME', _time_desde_sqlite)
+sqlite3.register_converter('DATE', lambda v: date.fromisoformat(v.decode()))
+sqlite3.register_converter('TIMESTAMP', lambda v: datetime.fromisoformat(v.decode()))
+sqlite3.register_converter('BOOLEAN', lambda v: bool(int(v)))
+
+ESQUEMA = """
+CREATE TABLE usuarios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    telegram_id INTEGER UNIQUE NOT NULL,
+    nombre TEXT NOT NULL,
+    username TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE auditorios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL,
+    capacidad INTEGER NOT NULL,
+    ubicacion TEXT NOT NULL,
+    descripcion TEXT,
+    activo BOOLEAN DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE eventos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    auditorio_id INTEGER NOT NULL REFERENCES auditorios(id),
+    usuario_telegram_id INTEGER NOT NULL REFERENCES usuarios(telegram_id),
+    nombre_evento TEXT NOT NULL,
+    fecha DATE NOT NULL,
+    hora_inicio TIME NOT NULL,
+    hora_fin TIME NOT NULL,
+    descripcion TEXT,
+    estado TEXT DEFAULT 'reservado',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    serie_id INTEGER,
+    recordatorio_enviado INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE series (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    auditorio_id INTEGER NOT NULL REFERENCES auditorios(id),
+    usuario_telegram_id INTEGER NOT NULL REFERENCES usuarios(telegram_id),
+    nombre_evento TEXT NOT NULL,
+    frecuencia TEXT NOT NULL,
+    fecha_inicio DATE NOT NULL,
+    fecha_fin DATE NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_eventos_auditorio_fecha ON eventos (auditorio_id, fecha, estado, hora_inicio);
+CREATE INDEX idx_eventos_usuario ON eventos (usuario_telegram_id, estado, fecha);
+CREATE INDEX idx_eventos_serie ON eventos (serie_id, estado, fecha);
+CREATE INDEX idx_eventos_recordatorio ON eventos (estado, recordatorio_enviado, fecha, hora_inicio);
+CREATE INDEX idx_eventos_fecha ON eventos (fecha);
+CREATE TABLE eventos_historico (
+    id INTEGER PRIMARY KEY,
+    auditorio_id INTEGER NOT NULL,
+    usuario_telegram_id INTEGER NOT NULL,
+    nombre_evento TEXT NOT NULL,
+    fecha DATE NOT NULL,
+    hora_inicio TIME NOT NULL,
+    hora_fin TIME NOT NULL,
+    descripcion TEXT,
+    estado TEXT NOT NULL,
+    created_at TIMESTAMP,
+    serie_id INTEGER,
+    recordatorio_enviado INTEGER NOT NULL DEFAULT 0,
+    archivado_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_historico_auditorio ON eventos_historico (auditorio_id, fecha, hora_inicio);
+CREATE INDEX idx_historico_usuario ON eventos_historico (usuario_telegram_id, fecha, hora_inicio);
+"""
+
+def traducir(sql: str) -> str:
+    return (sql.replace('%s', '?').replace('FOR UPDATE', '').replace('FROM DUAL', '')
+            .replace('CURDATE()', "DATE('now', 'localtime')"))
+
+class Cursor:
+    def __init__(self, raw, dictionary=False):
+        self._raw = raw
+        if dictionary:
+            self._raw.row_factory = sqlite3.Row
+        self._dictionary = dictionary
+    
+    def execute(self, sql, params=()):
+        try:
+            self._raw.execute(traducir(sql), tuple(params))
+        except sqlite3.IntegrityError as e:
+            # Mismo texto que MySQL, que es lo que comprueban los repositorios
+            if 'UNIQUE' in str(e):
+                raise sqlite3.IntegrityError(f"Duplicate entry: {e}") from e
+            raise
+    
+    def executemany(self, sql, filas):
+        self._raw.executemany(traducir(sql), filas)
+    
+    def _fila(self, fila):
+        return dict(fila) if self._dictionary and fila is not None else fila
+    
+    def fetchone(self):
+        return self._fila(self._raw.fetchone())
+    
+    def fetchall(self):
+        return [self._fila(f) for f in self._raw.fetchall()]
+    
+    @property
+    def description(self):
+        return self._raw.description
+    
+    @property
+    def rowcount(self):
+        return self._raw.rowcount
+    
+    @property
+    def lastrowid(self):
+        return self._raw.lastrowid
+    
+    def close(self):
+        self._raw.close()
+
+class Connection:
+    def __init__(self, raw):
+        self._raw = raw
+    
+    def cursor(self, dictionary=False, **kwargs):
+        return Cursor(self._raw.cursor(), dictionary)
+    
+    def start_transaction(self):
+        self._raw.execute("BEGIN IMMEDIATE")
+    
+    @property
+    def in_transaction(self):
+        return self._raw.in_transaction
+    
+    def commit(self):
+        if self._raw.in_transaction:
+            self._raw.execute("COMMIT")
+    
+    def rollback(self):
+        if self._raw.in_transaction:
+            self._raw.execute("ROLLBACK")
+    
+    def ping(self, reconnect=False):
+        pass
+    
+    def close(self):
+        self.rollback()
+
+class Pool:
+    """Reemplaza a ConnectionPool: una conexión SQLite por hilo"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.size = 8
+        self.max_overflow = 8
+        self._local = threading.local()
+    
+    def acquire(self):
+        raw = getattr(self._local, 'conn', None)
+        if raw is None:
+            raw = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                  check_same_thread=False, detect_types=sqlite3.PARSE_DECLTYPES)
+            raw.execute("PRAGMA journal_mode=WAL")
+            raw.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = raw
+        return Connection(raw)
+    
+    def status(self):
+        return {'size': self.size, 'max_overflow': self.max_overflow, 'backend': 'sqlite'}
+
+def sembrar(path: str, auditorios: int, dias: int, usuarios: int, ocupacion: float, semilla: int = 1):
+    """Crear la base y llenarla con eventos en [hoy - dias/2, hoy + dias/2]"""
+    rnd = random.Random(semilla)
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(ESQUEMA)
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO usuarios (telegram_id, nombre, username) VALUES (?, ?, ?)",
+        ((100000 + i, f"Usuario {i}", f"usuario{i}") for i in range(usuarios))
+    )
+    conn.executemany(
+        "INSERT INTO auditorios (nombre, capacidad, ubicacion, descripcion) VALUES (?, ?, ?, ?)",
+        ((f"Auditorio {i}", rnd.choice((30, 50, 80, 150, 200)), f"Edificio {i % 20} - Piso {i % 5}",
+          "Sala con proyector") for i in range(auditorios))
+    )
+    
+    inicio = date.today() - timedelta(days=dias // 2)
+    
+    def eventos():
+        for auditorio_id in range(1, auditorios + 1):
+            for d in range(dias):
+                if rnd.random() >= ocupacion:
+                    continue
+                fecha = (inicio + timedelta(days=d)).isoformat()
+                hora = 8
+                while hora < 20 and rnd.random() < 0.7:
+                    duracion = rnd.choice((1, 2, 3))
+                    yield (auditorio_id, 100000 + rnd.randrange(usuarios), f"Evento {auditorio_id}-{d}-{hora}",
+                           fecha, f"{hora:02d}:00:00", f"{min(hora + duracion, 22):02d}:00:00",
+                           "Sesión programada", 'cancelado' if rnd.random() < 0.05 else 'reservado')
+                    hora += duracion + rnd.choice((0, 1, 2))
+    
+    conn.executemany("""
+        INSERT INTO eventos (auditorio_id, usuario_telegram_id, nombre_evento, fecha,
+                             hora_inicio, hora_fin, descripcion, estado)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, eventos())
+    conn.execute("COMMIT")
+    total = conn.execute("SELECT COUNT(*) FROM eventos").fetchone()[0]
+    conn.execute("ANALYZE")
+    conn.close()
+    return total
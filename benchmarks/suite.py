@@ -0,0 +1,273 @@
+"""
+Suite de benchmarks offline para los handlers del bot y los repositorios.
+
+No usa red: la base de datos es un SQLite local sembrado con volúmenes
+realistas (benchmarks/sqlite_standin.py) y los handlers reciben objetos
+Update/CallbackQuery simulados. Para cada operación reporta percentiles de
+latencia y throughput, y guarda los resultados en JSON para comparar versiones.
+
+Uso:
+    python benchmarks/suite.py
+    python benchmarks/suite.py --auditorios 2000 --dias 730 --iteraciones 500
+    python benchmarks/suite.py --comparar benchmarks/resultados/anterior.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# ---------------------------------------------------------------------------
+# Objetos de Telegram simulados
+# ---------------------------------------------------------------------------
+
+class FakeMessage:
+    _ids = 0
+    
+    def __init__(self, chat_id, text=None):
+        FakeMessage._ids += 1
+        self.message_id = FakeMessage._ids
+        self.chat_id = chat_id
+        self.text = text
+        self.photo = None
+    
+    async def reply_text(self, text, **kwargs):
+        return FakeMessage(self.chat_id, text)
+    
+    async def reply_photo(self, photo, **kwargs):
+        mensaje = FakeMessage(self.chat_id)
+        mensaje.photo = [SimpleNamespace(file_id=f"file-{photo}" if not str(photo).startswith('file-') else photo)]
+        return mensaje
+    
+    async def delete(self):
+        return True
+
+class FakeCallbackQuery:
+    def __init__(self, user, data):
+        self.from_user = user
+        self.data = data
+        self.message = FakeMessage(user.id)
+    
+    async def answer(self, *args, **kwargs):
+        return True
+    
+    async def edit_message_text(self, text, **kwargs):
+        return self.message
+    
+    async def delete_message(self):
+        return True
+
+def fake_user(user_id):
+    return SimpleNamespace(id=user_id, first_name=f"Usuario{user_id}", full_name=f"Usuario {user_id}",
+                           username=f"usuario{user_id}")
+
+def update_mensaje(user, text):
+    return SimpleNamespace(effective_user=user, message=FakeMessage(user.id, text), callback_query=None)
+
+def update_callback(user, data):
+    return SimpleNamespace(effective_user=user, message=None, callback_query=FakeCallbackQuery(user, data))
+
+# ---------------------------------------------------------------------------
+# Medición
+# ---------------------------------------------------------------------------
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    k = max(0, min(len(valores) - 1, int(round(p / 100 * len(valores) + 0.5)) - 1))
+    return valores[k]
+
+async def medir(nombre, operacion, iteraciones, concurrencia):
+    """Ejecuta `operacion(i)` `iteraciones` veces con `concurrencia` tareas en paralelo"""
+    latencias = []
+    semaforo = asyncio.Semaphore(concurrencia)
+    
+    async def una(i):
+        async with semaforo:
+            inicio = time.perf_counter()
+            await operacion(i)
+            latencias.append(time.perf_counter() - inicio)
+    
+    inicio = time.perf_counter()
+    await asyncio.gather(*(una(i) for i in range(iteraciones)))
+    total = time.perf_counter() - inicio
+    
+    latencias.sort()
+    resultado = {
+        'iteraciones': iteraciones,
+        'ops_s': iteraciones / total,
+        'media_ms': sum(latencias) / len(latencias) * 1000,
+        'p50_ms': percentil(latencias, 50) * 1000,
+        'p90_ms': percentil(latencias, 90) * 1000,
+        'p99_ms': percentil(latencias, 99) * 1000,
+        'max_ms': latencias[-1] * 1000
+    }
+    print(f"{nombre:<38}{resultado['ops_s']:>10.1f}{resultado['p50_ms']:>10.2f}"
+          f"{resultado['p90_ms']:>10.2f}{resultado['p99_ms']:>10.2f}")
+    return resultado
+
+# ---------------------------------------------------------------------------
+# Escenarios
+# ---------------------------------------------------------------------------
+
+async def escenarios(args, rnd):
+    from database.async_repositories import AsyncEventoRepository
+    from database.models import Evento
+    from bot.handlers import TelegramBot
+    
+    bot = TelegramBot()
+    evento_repo = AsyncEventoRepository()
+    hoy = date.today()
+    usuarios = [fake_user(100000 + i) for i in range(args.usuarios)]
+    
+    def auditorio():
+        return rnd.randint(1, args.auditorios)
+    
+    def usuario():
+        return rnd.choice(usuarios)
+    
+    def fecha_futura():
+        return hoy + timedelta(days=rnd.randint(1, args.dias // 2 - 1))
+    
+    async def reservar_flujo(i):
+        user = usuario()
+        await bot.button_callback(update_callback(user, f"reservar_{auditorio()}"), None)
+        hora = rnd.randint(8, 20)
+        for texto in (f"Evento benchmark {i}",
+                      fecha_futura().strftime('%d/%m/%Y'),
+                      f"{hora:02d}:00",
+                      f"{hora + 1:02d}:00",
+                      "sin descripcion"):
+            await bot.handle_message(update_mensaje(user, texto), None)
+    
+    async def reservar_repo(i):
+        fecha = datetime.combine(fecha_futura(), datetime.min.time())
+        hora = rnd.randint(8, 20)
+        await evento_repo.reservar(Evento(
+            auditorio_id=auditorio(),
+            usuario_telegram_id=usuario().id,
+            nombre_evento=f"Reserva {i}",
+            fecha=fecha,
+            hora_inicio=fecha.replace(hour=hora),
+            hora_fin=fecha.replace(hour=hora + 1)
+        ))
+    
+    def callback(data):
+        return lambda i: bot.button_callback(update_callback(usuario(), data()), None)
+    
+    casos = [
+        ("bot.start", lambda i: bot.start(update_mensaje(usuario(), "/start"), None)),
+        ("bot.callback.ver_auditorios", callback(lambda: "ver_auditorios")),
+        ("bot.callback.auditorio", callback(lambda: f"auditorio_{auditorio()}")),
+        ("bot.callback.disponibilidad", callback(lambda: f"disponibilidad_{auditorio()}")),
+        ("bot.callback.eventos", callback(lambda: f"eventos_{auditorio()}")),
+        ("bot.callback.mis_reservas", callback(lambda: "mis_reservas")),
+        ("bot.callback.horarios_libres", callback(lambda: "horarios_libres")),
+        ("bot.callback.ayuda", callback(lambda: "ayuda")),
+        ("bot.callback.volver_inicio", callback(lambda: "volver_inicio")),
+        ("bot.handle_message.flujo_reserva", reservar_flujo),
+        ("repo.verificar_disponibilidad", lambda i: evento_repo.verificar_disponibilidad(
+            auditorio(), fecha_futura(), datetime(2000, 1, 1, 10), datetime(2000, 1, 1, 11))),
+        ("repo.reservar", reservar_repo),
+        ("repo.obtener_eventos_auditorio.fecha", lambda i: evento_repo.obtener_eventos_auditorio(
+            auditorio(), fecha_futura())),
+        ("repo.listar_eventos_auditorio", lambda i: evento_repo.listar_eventos_auditorio(auditorio(), limite=20)),
+        ("repo.listar_eventos_usuario", lambda i: evento_repo.listar_eventos_usuario(usuario().id, limite=20)),
+        ("repo.obtener_horarios_libres.semana", lambda i: evento_repo.obtener_horarios_libres(
+            hoy, hoy + timedelta(days=6), 60)),
+    ]
+    
+    print(f"{'operación':<38}{'ops/s':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+    resultados = {}
+    for nombre, operacion in casos:
+        if args.filtro and args.filtro not in nombre:
+            continue
+        iteraciones = max(1, args.iteraciones // 10) if 'horarios_libres' in nombre else args.iteraciones
+        resultados[nombre] = await medir(nombre, operacion, iteraciones, args.concurrencia)
+    return resultados
+
+# ---------------------------------------------------------------------------
+# Resultados
+# ---------------------------------------------------------------------------
+
+def version_git():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def comparar(actual, anterior):
+    print(f"\nComparación con {anterior['meta'].get('commit')} ({anterior['meta'].get('fecha')})")
+    print(f"{'operación':<38}{'p50 antes':>11}{'p50 ahora':>11}{'Δ p50':>9}{'Δ ops/s':>9}")
+    for nombre, r in actual['resultados'].items():
+        previo = anterior['resultados'].get(nombre)
+        if not previo:
+            continue
+        delta_p50 = (r['p50_ms'] / previo['p50_ms'] - 1) * 100 if previo['p50_ms'] else 0
+        delta_ops = (r['ops_s'] / previo['ops_s'] - 1) * 100 if previo['ops_s'] else 0
+        marca = "  ⚠" if delta_p50 > 20 else ""
+        print(f"{nombre:<38}{previo['p50_ms']:>11.2f}{r['p50_ms']:>11.2f}{delta_p50:>8.1f}%{delta_ops:>8.1f}%{marca}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--auditorios', type=int, default=1000)
+    parser.add_argument('--dias', type=int, default=730, help="días de historial, centrados en hoy")
+    parser.add_argument('--usuarios', type=int, default=2000)
+    parser.add_argument('--ocupacion', type=float, default=0.3, help="probabilidad de que un auditorio tenga eventos un día")
+    parser.add_argument('--iteraciones', type=int, default=300)
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--filtro', help="ejecutar solo las operaciones que contengan este texto")
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--salida', default=os.path.join(RAIZ, 'benchmarks', 'resultados'))
+    parser.add_argument('--comparar', help="archivo JSON de una ejecución anterior")
+    args = parser.parse_args()
+    
+    directorio = tempfile.mkdtemp(prefix="bench_auditorios_")
+    os.environ.setdefault('MEDIA_CACHE_PATH', os.path.join(directorio, 'media.json'))
+    os.environ.setdefault('ESTADOS_BACKEND', 'memoria')
+    os.environ.setdefault('FLOOD_CONTROL', 'false')
+    
+    from benchmarks import sqlite_standin
+    from database.connection import DatabaseConnection
+    
+    path = os.path.join(directorio, 'auditorios.db')
+    inicio = time.perf_counter()
+    total = sqlite_standin.sembrar(path, args.auditorios, args.dias, args.usuarios, args.ocupacion, args.semilla)
+    print(f"Base sembrada: {args.auditorios} auditorios, {total} eventos ({time.perf_counter() - inicio:.1f}s)\n")
+    DatabaseConnection._pool = sqlite_standin.Pool(path)
+    
+    resultados = asyncio.run(escenarios(args, random.Random(args.semilla)))
+    
+    salida = {
+        'meta': {
+            'commit': version_git(),
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'parametros': {k: v for k, v in vars(args).items() if k not in ('salida', 'comparar')},
+            'eventos': total
+        },
+        'resultados': resultados
+    }
+    os.makedirs(args.salida, exist_ok=True)
+    archivo = os.path.join(args.salida, f"{datetime.now():%Y%m%d-%H%M%S}-{salida['meta']['commit'] or 'local'}.json")
+    with open(archivo, 'w', encoding='utf-8') as f:
+        json.dump(salida, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {archivo}")
+    
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            comparar(salida, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from database.metrics import REGISTRO
+
+LIMITADAS = REGISTRO.contador(
+    'auditorios_bot_limitadas_total',
+    'Actualizaciones descartadas antes de llegar a los handlers',
+    ('motivo',)
+)
+
+class _Cubeta:
+    __slots__ = ('tokens', 'actualizado', 'avisado', 'data', 'mensaje_id', 'respondido')
+    
+    def __init__(self, capacidad: float, ahora: float):
+        self.tokens = capacidad
+        self.actualizado = ahora
+        self.avisado = False
+        self.data = None
+        self.mensaje_id = None
+        self.respondido = 0.0
+
+class LimitadorUsuarios:
+    """
+    Control de flood por usuario de Telegram.
+    
+    - Token bucket: cada actualización consume un token; se recargan a
+      `recarga` tokens por segundo hasta `capacidad`.
+    - Coalescencia: un callback con el mismo callback_data sobre el mismo
+      mensaje que se acaba de renderizar se responde sin volver a ejecutarlo.
+    
+    Guarda como máximo `max_usuarios` cubetas (LRU); un usuario desalojado
+    vuelve a empezar con la cubeta llena.
+    """
+    
+    def __init__(self, capacidad: float = 10, recarga: float = 1.0,
+                 ventana_duplicados: float = 3.0, max_usuarios: int = 10000):
+        self.capacidad = capacidad
+        self.recarga = recarga
+        self.ventana_duplicados = ventana_duplicados
+        self.max_usuarios = max_usuarios
+        self._cubetas = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _cubeta(self, user_id: int, ahora: float) -> _Cubeta:
+        cubeta = self._cubetas.get(user_id)
+        if cubeta is None:
+            cubeta = self._cubetas[user_id] = _Cubeta(self.capacidad, ahora)
+            if len(self._cubetas) > self.max_usuarios:
+                self._cubetas.popitem(last=False)
+        else:
+            self._cubetas.move_to_end(user_id)
+        return cubeta
+    
+    def permitir(self, user_id: int):
+        """
+        Consumir un token. Devuelve (permitido, avisar): `avisar` es True solo la
+        primera vez que se rechaza en una racha, para no responder a cada mensaje.
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            cubeta = self._cubeta(user_id, ahora)
+            cubeta.tokens = min(self.capacidad, cubeta.tokens + (ahora - cubeta.actualizado) * self.recarga)
+            cubeta.actualizado = ahora
+            if cubeta.tokens >= 1:
+                cubeta.tokens -= 1
+                cubeta.avisado = False
+                return True, False
+            avisar = not cubeta.avisado
+            cubeta.avisado = True
+        LIMITADAS.incrementar('limite')
+        return False, avisar
+    
+    def es_duplicado(self, user_id: int, data: str, mensaje_id) -> bool:
+        """True si `data` ya se renderizó en ese mensaje hace menos de `ventana_duplicados` segundos"""
+        with self._lock:
+            cubeta = self._cubetas.get(user_id)
+            duplicado = (cubeta is not None and cubeta.data == data and cubeta.mensaje_id == mensaje_id
+                         and time.monotonic() - cubeta.respondido < self.ventana_duplicados)
+        if duplicado:
+            LIMITADAS.incrementar('duplicado')
+        return duplicado
+    
+    def registrar_respuesta(self, user_id: int, data: str, mensaje_id):
+        """Recordar el último callback renderizado por el usuario"""
+        with self._lock:
+            cubeta = self._cubetas.get(user_id)
+            if cubeta is not None:
+                cubeta.data = data
+                cubeta.mensaje_id = mensaje_id
+                cubeta.respondido = time.monotonic()
+    
+    def info(self):
+        with self._lock:
+            return {
+                'usuarios': len(self._cubetas),
+                'max_usuarios': self.max_usuarios,
+                'capacidad': self.capacidad,
+                'recarga': self.recarga
+            }
+
+def crear_limitador():
+    """Limitador configurado por variables de entorno, o None si FLOOD_CONTROL=false"""
+    if os.getenv('FLOOD_CONTROL', 'true').lower() not in ('1', 'true', 'yes'):
+        return None
+    return LimitadorUsuarios(
+        capacidad=float(os.getenv('FLOOD_CAPACIDAD', '10')),
+        recarga=float(os.getenv('FLOOD_RECARGA', '1')),
+        ventana_duplicados=float(os.getenv('FLOOD_VENTANA_DUPLICADOS', '3')),
+        max_usuarios=int(os.getenv('FLOOD_MAX_USUARIOS', '10000'))
+    )
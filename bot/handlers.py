@@ -1,48 +1,135 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from datetime import datetime, date, time
-from database.repositories import UsuarioRepository, AuditorioRepository, EventoRepository
+from datetime import datetime, date, time, timedelta
+import asyncio
+import os
+from functools import partial
+from database.async_repositories import AsyncUsuarioRepository, AsyncAuditorioRepository, AsyncEventoRepository
 from database.models import Evento
+from bot.state_store import crear_state_store
+from bot.media import crear_media_registry
+from bot.flood_control import crear_limitador
+from bot.send_queue import crear_cola_envios
+from bot.recordatorios import crear_programador
+from database.archivo import archivar_eventos, configuracion as configuracion_archivo
+from bot import views
+from database import metrics, tracing
 import re
 
+# Límite práctico de texto por mensaje (Telegram admite 4096 caracteres)
+MAX_LONGITUD_MENSAJE = 3800
+# Duración mínima (minutos) de las ventanas mostradas en "Horarios Libres"
+DURACION_MINIMA_LIBRE = 60
+# Eventos por página en los listados (cada reserva añade un botón al teclado)
+EVENTOS_POR_PAGINA = 8
+# Dirección de paginación codificada en el callback_data
+DIRECCIONES = {"s": "siguiente", "a": "anterior"}
+# Respuesta cuando un usuario supera el límite de solicitudes
+MENSAJE_LIMITE = "⏳ Demasiadas solicitudes seguidas, espera unos segundos."
+# Prefijos de callback_data usados como etiqueta de las métricas (cardinalidad acotada)
+TIPOS_CALLBACK = ("ver_auditorios", "mis_reservas", "ayuda", "horarios_libres", "auditorio",
+                  "disponibilidad", "eventos", "reservar", "cancelar", "volver_inicio")
+
+def tipo_callback(data: str) -> str:
+    for tipo in TIPOS_CALLBACK:
+        if data == tipo or data.startswith(tipo + "_"):
+            return tipo
+    return "otro"
+
 class TelegramBot:
     def __init__(self):
-        self.usuario_repo = UsuarioRepository()
-        self.auditorio_repo = AuditorioRepository()
-        self.evento_repo = EventoRepository()
-        self.user_states = {}  # Para manejar estados de conversación
+        self.usuario_repo = AsyncUsuarioRepository()
+        self.auditorio_repo = AsyncAuditorioRepository()
+        self.evento_repo = AsyncEventoRepository()
+        self.user_states = crear_state_store()  # Para manejar estados de conversación
+        self.media = crear_media_registry()  # file_id de las imágenes ya enviadas
+        self.limitador = crear_limitador()  # control de flood por usuario (None si está desactivado)
+        self.envios = crear_cola_envios()  # cola de salida hacia Telegram (rate_limiter de la aplicación)
+        self.recordatorios = crear_programador(self.evento_repo, self.auditorio_repo, self.envios)
+        self.archivo_intervalo = float(os.getenv('ARCHIVO_INTERVALO', '3600'))  # 0 desactiva el archivado
+        self._archivado = None
+    
+    async def post_init(self, application):
+        """Reanudar los envíos pendientes, iniciar recordatorios y archivado, y precargar las imágenes"""
+        await self.envios.iniciar(application.bot)
+        if self.recordatorios is not None:
+            await self.recordatorios.iniciar()
+        if self.archivo_intervalo > 0:
+            self._archivado = asyncio.create_task(self.archivar_periodicamente(), name="archivado")
+        chat_id = os.getenv('MEDIA_PRELOAD_CHAT_ID')
+        if chat_id:
+            await self.media.precargar(application.bot, int(chat_id))
+    
+    async def post_shutdown(self, application):
+        if self.recordatorios is not None:
+            await self.recordatorios.detener()
+        if self._archivado is not None:
+            self._archivado.cancel()
+    
+    async def archivar_periodicamente(self):
+        """Mover eventos pasados y cancelados a eventos_historico cada archivo_intervalo segundos"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                # En un hilo propio: entre lotes duerme y no debe ocupar el executor de consultas
+                total = await loop.run_in_executor(None, partial(archivar_eventos, **configuracion_archivo()))
+                if total:
+                    print(f"📦 {total} eventos archivados")
+            except Exception as e:
+                print(f"Error archivando eventos: {e}")
+            await asyncio.sleep(self.archivo_intervalo)
     
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if self.limitador is not None:
+            permitido, avisar = self.limitador.permitir(update.effective_user.id)
+            if not permitido:
+                if avisar:
+                    await update.message.reply_text(MENSAJE_LIMITE)
+                return
+        
+        with metrics.BOT_COMANDOS.medir("start"), tracing.origen("bot:start"):
+            await self.procesar_start(update)
+    
+    async def procesar_start(self, update: Update):
         user = update.effective_user
         
         # Crear usuario si no existe
-        self.usuario_repo.crear_usuario(
+        await self.usuario_repo.crear_usuario(
             telegram_id=user.id,
             nombre=user.full_name,
             username=user.username
         )
         
-        keyboard = [
-            [InlineKeyboardButton("🏛️ Ver Auditorios", callback_data="ver_auditorios")],
-            [InlineKeyboardButton("📅 Mis Reservas", callback_data="mis_reservas")],
-            [InlineKeyboardButton("ℹ️ Ayuda", callback_data="ayuda")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        # URL de la imagen en S3
-        image_url = "https://cv-cristian-cabana.s3.us-east-1.amazonaws.com/bot.JPG"
-        
         # Enviar imagen con caption y teclado
-        await update.message.reply_photo(
-            photo=image_url,
-            caption=f"¡Hola {user.first_name}! 👋\n\n"
-                   "Bienvenido al sistema de reservas de auditorios.\n"
-                   "¿Qué te gustaría hacer?",
-            reply_markup=reply_markup
+        await self.media.enviar_foto(
+            update.message.reply_photo,
+            'bienvenida',
+            caption=views.caption_bienvenida(user.first_name),
+            reply_markup=views.MENU_PRINCIPAL
         )
     
     async def button_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         query = update.callback_query
+        user_id = query.from_user.id
+        mensaje_id = query.message.message_id if query.message else None
+        if self.limitador is not None:
+            # Toque repetido sobre un mensaje que ya muestra ese resultado: solo confirmar
+            if self.limitador.es_duplicado(user_id, query.data, mensaje_id):
+                await query.answer()
+                return
+            permitido, avisar = self.limitador.permitir(user_id)
+            if not permitido:
+                await query.answer(MENSAJE_LIMITE if avisar else None)
+                return
+        
+        tipo = tipo_callback(query.data)
+        with metrics.BOT_CALLBACKS.medir(tipo), tracing.origen(f"bot:callback:{tipo}"):
+            await self.procesar_callback(query)
+        
+        if self.limitador is not None:
+            self.limitador.registrar_respuesta(user_id, query.data, mensaje_id)
+    
+    async def procesar_callback(self, query):
         await query.answer()
         
         try:
@@ -50,8 +137,13 @@ class TelegramBot:
                 await self.mostrar_auditorios(query)
             elif query.data == "mis_reservas":
                 await self.mostrar_mis_reservas(query)
+            elif query.data.startswith("mis_reservas_"):
+                _, _, direccion, cursor = query.data.split("_")
+                await self.mostrar_mis_reservas(query, cursor, DIRECCIONES[direccion])
             elif query.data == "ayuda":
                 await self.mostrar_ayuda(query)
+            elif query.data == "horarios_libres":
+                await self.mostrar_horarios_libres(query)
             elif query.data.startswith("auditorio_"):
                 auditorio_id = int(query.data.split("_")[1])
                 await self.mostrar_opciones_auditorio(query, auditorio_id)
@@ -59,8 +151,12 @@ class TelegramBot:
                 auditorio_id = int(query.data.split("_")[1])
                 await self.mostrar_disponibilidad(query, auditorio_id)
             elif query.data.startswith("eventos_"):
-                auditorio_id = int(query.data.split("_")[1])
-                await self.mostrar_eventos(query, auditorio_id)
+                partes = query.data.split("_")
+                auditorio_id = int(partes[1])
+                if len(partes) == 4:
+                    await self.mostrar_eventos(query, auditorio_id, partes[3], DIRECCIONES[partes[2]])
+                else:
+                    await self.mostrar_eventos(query, auditorio_id)
             elif query.data.startswith("reservar_"):
                 auditorio_id = int(query.data.split("_")[1])
                 await self.iniciar_reserva(query, auditorio_id)
@@ -84,52 +180,28 @@ class TelegramBot:
                 raise e
     
     async def mostrar_auditorios(self, query):
-        auditorios = self.auditorio_repo.obtener_auditorios()
+        auditorios, version = await self.auditorio_repo.obtener_auditorios_versionado()
         
         if not auditorios:
             await query.edit_message_text("No hay auditorios disponibles.")
             return
         
-        keyboard = []
-        for auditorio in auditorios:
-            keyboard.append([
-                InlineKeyboardButton(
-                    f"🏛️ {auditorio.nombre} ({auditorio.capacidad} personas)",
-                    callback_data=f"auditorio_{auditorio.id}"
-                )
-            ])
-        
-        keyboard.append([InlineKeyboardButton("⬅️ Volver", callback_data="volver_inicio")])
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = views.teclado_auditorios(auditorios, version)
         
         await query.edit_message_text(
-            "📋 **Auditorios Disponibles**\n\n"
-            "Selecciona un auditorio para ver sus opciones:",
+            views.TEXTO_AUDITORIOS,
             reply_markup=reply_markup,
             parse_mode='Markdown'
         )
     
     async def mostrar_opciones_auditorio(self, query, auditorio_id):
-        auditorio = self.auditorio_repo.obtener_auditorio(auditorio_id)
+        auditorio = await self.auditorio_repo.obtener_auditorio(auditorio_id)
         
         if not auditorio:
             await query.edit_message_text("Auditorio no encontrado.")
             return
         
-        keyboard = [
-            [InlineKeyboardButton("📅 Ver Disponibilidad", callback_data=f"disponibilidad_{auditorio_id}")],
-            [InlineKeyboardButton("🎭 Ver Eventos", callback_data=f"eventos_{auditorio_id}")],
-            [InlineKeyboardButton("➕ Hacer Reserva", callback_data=f"reservar_{auditorio_id}")],
-            [InlineKeyboardButton("⬅️ Volver", callback_data="ver_auditorios")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        text = f"🏛️ **{auditorio.nombre}**\n\n"
-        text += f"📍 **Ubicación:** {auditorio.ubicacion}\n"
-        text += f"👥 **Capacidad:** {auditorio.capacidad} personas\n"
-        if auditorio.descripcion:
-            text += f"📝 **Descripción:** {auditorio.descripcion}\n"
-        text += "\n¿Qué te gustaría hacer?"
+        text, reply_markup = views.vista_opciones_auditorio(auditorio)
         
         await query.edit_message_text(
             text,
@@ -138,11 +210,13 @@ class TelegramBot:
         )
     
     async def mostrar_disponibilidad(self, query, auditorio_id):
-        auditorio = self.auditorio_repo.obtener_auditorio(auditorio_id)
         hoy = date.today()
         
         # Verificar disponibilidad para hoy
-        eventos_hoy = self.evento_repo.obtener_eventos_auditorio(auditorio_id, hoy)
+        auditorio, eventos_hoy = await asyncio.gather(
+            self.auditorio_repo.obtener_auditorio(auditorio_id),
+            self.evento_repo.obtener_eventos_auditorio(auditorio_id, hoy)
+        )
         
         text = f"📅 **Disponibilidad - {auditorio.nombre}**\n\n"
         text += f"**Fecha:** {hoy.strftime('%d/%m/%Y')}\n\n"
@@ -154,11 +228,7 @@ class TelegramBot:
         else:
             text += "✅ **¡Auditorio completamente disponible hoy!**\n"
         
-        keyboard = [
-            [InlineKeyboardButton("➕ Hacer Reserva", callback_data=f"reservar_{auditorio_id}")],
-            [InlineKeyboardButton("⬅️ Volver", callback_data=f"auditorio_{auditorio_id}")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = views.teclado_auditorio(auditorio_id)
         
         await query.edit_message_text(
             text,
@@ -166,14 +236,28 @@ class TelegramBot:
             parse_mode='Markdown'
         )
     
-    async def mostrar_eventos(self, query, auditorio_id):
-        auditorio = self.auditorio_repo.obtener_auditorio(auditorio_id)
-        eventos = self.evento_repo.obtener_eventos_auditorio(auditorio_id)
+    def botones_pagina(self, pagina, prefijo):
+        """Fila de botones anterior/siguiente para una página de eventos"""
+        fila = []
+        if pagina.anterior:
+            fila.append(InlineKeyboardButton("⬅️ Anteriores", callback_data=f"{prefijo}_a_{pagina.anterior}"))
+        if pagina.siguiente:
+            fila.append(InlineKeyboardButton("Siguientes ➡️", callback_data=f"{prefijo}_s_{pagina.siguiente}"))
+        return [fila] if fila else []
+    
+    async def mostrar_eventos(self, query, auditorio_id, cursor=None, direccion="siguiente"):
+        auditorio, pagina = await asyncio.gather(
+            self.auditorio_repo.obtener_auditorio(auditorio_id),
+            self.evento_repo.listar_eventos_auditorio(
+                auditorio_id, limite=EVENTOS_POR_PAGINA, cursor=cursor, direccion=direccion
+            )
+        )
+        eventos = pagina.eventos
         
         text = f"🎭 **Eventos - {auditorio.nombre}**\n\n"
         
         if eventos:
-            for evento in eventos[:10]:  # Mostrar máximo 10 eventos
+            for evento in eventos:
                 fecha_str = evento.fecha.strftime('%d/%m/%Y')
                 hora_inicio = evento.hora_inicio.strftime('%H:%M')
                 hora_fin = evento.hora_fin.strftime('%H:%M')
@@ -187,9 +271,45 @@ class TelegramBot:
         else:
             text += "No hay eventos programados para este auditorio."
         
+        paginacion = self.botones_pagina(pagina, f"eventos_{auditorio_id}")
+        reply_markup = views.teclado_auditorio(auditorio_id)
+        if paginacion:
+            reply_markup = InlineKeyboardMarkup(paginacion + list(reply_markup.inline_keyboard))
+        
+        await query.edit_message_text(
+            text,
+            reply_markup=reply_markup,
+            parse_mode='Markdown'
+        )
+    
+    async def mostrar_horarios_libres(self, query):
+        desde = date.today()
+        hasta = desde + timedelta(days=6)
+        horarios = await self.evento_repo.obtener_horarios_libres(desde, hasta, DURACION_MINIMA_LIBRE)
+        
+        text = "🔎 **Horarios Libres - Próximos 7 días**\n"
+        text += f"_Ventanas de al menos {DURACION_MINIMA_LIBRE} minutos_\n"
+        
+        if not horarios:
+            text += "\nNo hay horarios libres en los próximos días."
+        
+        fecha_actual = None
+        for horario in horarios:
+            if horario.fecha != fecha_actual:
+                fecha_actual = horario.fecha
+                linea = f"\n📅 **{fecha_actual.strftime('%d/%m/%Y')}**\n"
+            else:
+                linea = ""
+            linea += f"• {horario.auditorio_nombre}: {horario.hora_inicio.strftime('%H:%M')} - {horario.hora_fin.strftime('%H:%M')}\n"
+            
+            if len(text) + len(linea) > MAX_LONGITUD_MENSAJE:
+                text += "\n…"
+                break
+            text += linea
+        
         keyboard = [
-            [InlineKeyboardButton("➕ Hacer Reserva", callback_data=f"reservar_{auditorio_id}")],
-            [InlineKeyboardButton("⬅️ Volver", callback_data=f"auditorio_{auditorio_id}")]
+            [InlineKeyboardButton("🏛️ Ver Auditorios", callback_data="ver_auditorios")],
+            [InlineKeyboardButton("⬅️ Volver", callback_data="volver_inicio")]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
@@ -206,7 +326,7 @@ class TelegramBot:
             'auditorio_id': auditorio_id
         }
         
-        auditorio = self.auditorio_repo.obtener_auditorio(auditorio_id)
+        auditorio = await self.auditorio_repo.obtener_auditorio(auditorio_id)
         
         await query.edit_message_text(
             f"📝 **Nueva Reserva - {auditorio.nombre}**\n\n"
@@ -217,18 +337,30 @@ class TelegramBot:
         user_id = update.effective_user.id
         message_text = update.message.text
         
-        if user_id not in self.user_states:
+        if self.limitador is not None:
+            permitido, avisar = self.limitador.permitir(user_id)
+            if not permitido:
+                if avisar:
+                    await update.message.reply_text(MENSAJE_LIMITE)
+                return
+        
+        state = self.user_states.get(user_id)
+        paso = state['state'] if state is not None else 'sin_estado'
+        with metrics.BOT_PASOS.medir(paso), tracing.origen(f"bot:mensaje:{paso}"):
+            await self.procesar_paso(update, user_id, message_text, state)
+    
+    async def procesar_paso(self, update: Update, user_id: int, message_text: str, state):
+        if state is None:
             await update.message.reply_text(
                 "Por favor, inicia el proceso de reserva desde el menú principal.\n"
                 "Usa /start para comenzar."
             )
             return
         
-        state = self.user_states[user_id]
-        
         if state['state'] == 'esperando_nombre_evento':
             state['nombre_evento'] = message_text
             state['state'] = 'esperando_fecha'
+            self.user_states[user_id] = state
             
             await update.message.reply_text(
                 f"✅ Evento: **{message_text}**\n\n"
@@ -249,6 +381,7 @@ class TelegramBot:
                 
                 state['fecha'] = fecha
                 state['state'] = 'esperando_hora_inicio'
+                self.user_states[user_id] = state
                 
                 await update.message.reply_text(
                     f"✅ Fecha: **{fecha.strftime('%d/%m/%Y')}**\n\n"
@@ -256,7 +389,7 @@ class TelegramBot:
                     "Ejemplo: 14:30",
                     parse_mode='Markdown'
                 )
-                
+            
             except ValueError:
                 await update.message.reply_text(
                     "❌ Formato de fecha incorrecto.\n"
@@ -269,6 +402,7 @@ class TelegramBot:
                 hora_inicio = datetime.strptime(message_text, '%H:%M').time()
                 state['hora_inicio'] = hora_inicio
                 state['state'] = 'esperando_hora_fin'
+                self.user_states[user_id] = state
                 
                 await update.message.reply_text(
                     f"✅ Hora de inicio: **{hora_inicio.strftime('%H:%M')}**\n\n"
@@ -276,7 +410,7 @@ class TelegramBot:
                     "Ejemplo: 16:30",
                     parse_mode='Markdown'
                 )
-                
+            
             except ValueError:
                 await update.message.reply_text(
                     "❌ Formato de hora incorrecto.\n"
@@ -297,6 +431,7 @@ class TelegramBot:
                 
                 state['hora_fin'] = hora_fin
                 state['state'] = 'esperando_descripcion'
+                self.user_states[user_id] = state
                 
                 await update.message.reply_text(
                     f"✅ Hora de fin: **{hora_fin.strftime('%H:%M')}**\n\n"
@@ -304,7 +439,7 @@ class TelegramBot:
                     "(o escribe 'sin descripcion' para omitir):",
                     parse_mode='Markdown'
                 )
-                
+            
             except ValueError:
                 await update.message.reply_text(
                     "❌ Formato de hora incorrecto.\n"
@@ -319,15 +454,20 @@ class TelegramBot:
             fecha_inicio = datetime.combine(state['fecha'], state['hora_inicio'])
             fecha_fin = datetime.combine(state['fecha'], state['hora_fin'])
             
-            # Verificar disponibilidad
-            disponible = self.evento_repo.verificar_disponibilidad(
-                state['auditorio_id'],
-                state['fecha'],
-                fecha_inicio,
-                fecha_fin
+            evento = Evento(
+                auditorio_id=state['auditorio_id'],
+                usuario_telegram_id=user_id,
+                nombre_evento=state['nombre_evento'],
+                fecha=fecha_inicio,
+                hora_inicio=fecha_inicio,
+                hora_fin=fecha_fin,
+                descripcion=descripcion
             )
             
-            if not disponible:
+            # Verificar disponibilidad y reservar en una sola transacción
+            resultado = await self.evento_repo.reservar(evento)
+            
+            if resultado.estado == "conflicto":
                 await update.message.reply_text(
                     "❌ **Conflicto de horarios**\n\n"
                     "Ya existe una reserva en el horario seleccionado.\n"
@@ -338,18 +478,8 @@ class TelegramBot:
                 del self.user_states[user_id]
                 return
             
-            evento = Evento(
-                auditorio_id=state['auditorio_id'],
-                usuario_telegram_id=user_id,
-                nombre_evento=state['nombre_evento'],
-                fecha=fecha_inicio,
-                hora_inicio=fecha_inicio,
-                hora_fin=fecha_fin,
-                descripcion=descripcion
-            )
-            
-            if self.evento_repo.crear_evento(evento):
-                auditorio = self.auditorio_repo.obtener_auditorio(state['auditorio_id'])
+            if resultado.exito:
+                auditorio = await self.auditorio_repo.obtener_auditorio(state['auditorio_id'])
                 
                 await update.message.reply_text(
                     f"✅ **¡Reserva creada exitosamente!**\n\n"
@@ -370,18 +500,18 @@ class TelegramBot:
             
             del self.user_states[user_id]
     
-    async def mostrar_mis_reservas(self, query):
+    async def mostrar_mis_reservas(self, query, cursor=None, direccion="siguiente"):
         user_id = query.from_user.id
-        eventos = self.evento_repo.obtener_eventos_usuario(user_id)
+        pagina = await self.evento_repo.listar_eventos_usuario(
+            user_id, limite=EVENTOS_POR_PAGINA, cursor=cursor, direccion=direccion
+        )
+        eventos = pagina.eventos
         
         if not eventos:
-            keyboard = [[InlineKeyboardButton("⬅️ Volver", callback_data="volver_inicio")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
             await query.edit_message_text(
                 "📅 **Mis Reservas**\n\n"
                 "No tienes reservas activas.",
-                reply_markup=reply_markup,
+                reply_markup=views.VOLVER_INICIO,
                 parse_mode='Markdown'
             )
             return
@@ -396,7 +526,7 @@ class TelegramBot:
             
             text += f"🎯 **{evento.nombre_evento}**\n"
             text += f"📅 {fecha_str} | ⏰ {hora_inicio} - {hora_fin}\n"
-            text += f"🏛️ Auditorio ID: {evento.auditorio_id}\n"
+            text += f"🏛️ {evento.auditorio_nombre}\n"
             
             # Botón para cancelar cada reserva
             keyboard.append([
@@ -407,6 +537,7 @@ class TelegramBot:
             ])
             text += "\n"
         
+        keyboard += self.botones_pagina(pagina, "mis_reservas")
         keyboard.append([InlineKeyboardButton("⬅️ Volver", callback_data="volver_inicio")])
         reply_markup = InlineKeyboardMarkup(keyboard)
         
@@ -419,7 +550,7 @@ class TelegramBot:
     async def cancelar_reserva(self, query, evento_id):
         user_id = query.from_user.id
         
-        if self.evento_repo.cancelar_evento(evento_id, user_id):
+        if await self.evento_repo.cancelar_evento(evento_id, user_id):
             await query.answer("✅ Reserva cancelada exitosamente", show_alert=True)
             # Actualizar la vista de reservas
             await self.mostrar_mis_reservas(query)
@@ -427,126 +558,66 @@ class TelegramBot:
             await query.answer("❌ Error al cancelar la reserva", show_alert=True)
     
     async def mostrar_ayuda(self, query):
-        text = """
-ℹ️ **Ayuda - Sistema de Reservas**
-
-**Funciones disponibles:**
-
-🏛️ **Ver Auditorios**
-- Consulta todos los auditorios disponibles
-- Ve información detallada de cada uno
-- Consulta disponibilidad y eventos
-
-📅 **Disponibilidad**
-- Verifica horarios libres
-- Ve eventos programados
-- Planifica tu reserva
-
-➕ **Hacer Reserva**
-- Reserva un auditorio
-- Especifica fecha y horario
-- Añade descripción del evento
-
-📋 **Mis Reservas**
-- Ve todas tus reservas activas
-- Cancela reservas que creaste
-- Gestiona tus eventos
-
-**Formato de datos:**
-- Fecha: DD/MM/YYYY (ej: 15/12/2024)
-- Hora: HH:MM (ej: 14:30)
-
-**Notas importantes:**
-- Solo puedes cancelar reservas que tú creaste
-- No se pueden hacer reservas en fechas pasadas
-- La hora de fin debe ser posterior a la de inicio
-        """
-        
-        keyboard = [[InlineKeyboardButton("⬅️ Volver", callback_data="volver_inicio")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await query.edit_message_text(
-            text,
-            reply_markup=reply_markup,
+            views.TEXTO_AYUDA,
+            reply_markup=views.VOLVER_INICIO,
             parse_mode='Markdown'
         )
     
     async def volver_inicio(self, query):
-        keyboard = [
-            [InlineKeyboardButton("🏛️ Ver Auditorios", callback_data="ver_auditorios")],
-            [InlineKeyboardButton("📅 Mis Reservas", callback_data="mis_reservas")],
-            [InlineKeyboardButton("ℹ️ Ayuda", callback_data="ayuda")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        # URL de la imagen en S3
-        image_url = "https://cv-cristian-cabana.s3.us-east-1.amazonaws.com/bot.JPG"
-        
         # Eliminar el mensaje anterior y enviar nueva imagen con texto
         await query.delete_message()
-        await query.message.reply_photo(
-            photo=image_url,
-            caption="🏛️ **Sistema de Reservas de Auditorios**\n\n"
-                   "¿Qué te gustaría hacer?",
-            reply_markup=reply_markup,
+        await self.media.enviar_foto(
+            query.message.reply_photo,
+            'bienvenida',
+            caption=views.CAPTION_MENU,
+            reply_markup=views.MENU_PRINCIPAL,
             parse_mode='Markdown'
         )
     
     async def enviar_nuevo_mensaje_auditorios(self, query):
-        auditorios = self.auditorio_repo.obtener_auditorios()
+        auditorios, version = await self.auditorio_repo.obtener_auditorios_versionado()
         
         if not auditorios:
             await query.message.reply_text("No hay auditorios disponibles.")
             return
         
-        keyboard = []
-        for auditorio in auditorios:
-            keyboard.append([
-                InlineKeyboardButton(
-                    f"🏛️ {auditorio.nombre} ({auditorio.capacidad} personas)",
-                    callback_data=f"auditorio_{auditorio.id}"
-                )
-            ])
-        
-        keyboard.append([InlineKeyboardButton("⬅️ Volver", callback_data="volver_inicio")])
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = views.teclado_auditorios(auditorios, version)
         
         await query.message.reply_text(
-            "📋 **Auditorios Disponibles**\n\n"
-            "Selecciona un auditorio para ver sus opciones:",
+            views.TEXTO_AUDITORIOS,
             reply_markup=reply_markup,
             parse_mode='Markdown'
         )
     
     async def enviar_nuevo_mensaje_reservas(self, query):
         user_id = query.from_user.id
-        eventos = self.evento_repo.obtener_eventos_usuario(user_id)
+        pagina = await self.evento_repo.listar_eventos_usuario(user_id, limite=EVENTOS_POR_PAGINA)
+        eventos = pagina.eventos
         
         if not eventos:
-            keyboard = [[InlineKeyboardButton("⬅️ Volver", callback_data="volver_inicio")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
             await query.message.reply_text(
                 "No tienes reservas activas.",
-                reply_markup=reply_markup
+                reply_markup=views.VOLVER_INICIO
             )
             return
-            
+        
         mensaje = "📅 **Tus Reservas**\n\n"
         keyboard = []
         
         for evento in eventos:
-            auditorio = self.auditorio_repo.obtener_auditorio(evento.auditorio_id)
-            mensaje += f"🏛️ *{auditorio.nombre}*\n"
+            mensaje += f"🏛️ *{evento.auditorio_nombre}*\n"
             mensaje += f"📅 Fecha: {evento.fecha}\n"
             mensaje += f"⏰ Hora: {evento.hora_inicio} - {evento.hora_fin}\n"
             mensaje += f"📝 Descripción: {evento.descripcion}\n\n"
             keyboard.append([
                 InlineKeyboardButton(
-                    f"❌ Cancelar reserva - {auditorio.nombre} ({evento.fecha})",
+                    f"❌ Cancelar reserva - {evento.auditorio_nombre} ({evento.fecha})",
                     callback_data=f"cancelar_{evento.id}"
                 )
             ])
         
+        keyboard += self.botones_pagina(pagina, "mis_reservas")
         keyboard.append([InlineKeyboardButton("⬅️ Volver", callback_data="volver_inicio")])
         reply_markup = InlineKeyboardMarkup(keyboard)
         
@@ -557,46 +628,16 @@ class TelegramBot:
         )
     
     async def enviar_nuevo_mensaje_ayuda(self, query):
-        keyboard = [[InlineKeyboardButton("⬅️ Volver", callback_data="volver_inicio")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        mensaje = ("ℹ️ *Ayuda del Bot*\n\n"
-                  "Aquí están los comandos disponibles:\n\n"
-                  "🏛️ *Ver Auditorios*\n"
-                  "- Muestra la lista de auditorios disponibles\n"
-                  "- Permite ver detalles y hacer reservas\n\n"
-                  "📅 *Mis Reservas*\n"
-                  "- Muestra tus reservas activas\n"
-                  "- Permite cancelar reservas\n\n"
-                  "Para hacer una reserva:\n"
-                  "1. Selecciona 'Ver Auditorios'\n"
-                  "2. Elige el auditorio deseado\n"
-                  "3. Selecciona 'Reservar'\n"
-                  "4. Sigue las instrucciones\n\n"
-                  "Para cancelar una reserva:\n"
-                  "1. Selecciona 'Mis Reservas'\n"
-                  "2. Elige 'Cancelar' en la reserva deseada")
-        
         await query.message.reply_text(
-            mensaje,
-            reply_markup=reply_markup,
+            views.TEXTO_AYUDA_BREVE,
+            reply_markup=views.VOLVER_INICIO,
             parse_mode='Markdown'
         )
     
     async def enviar_nuevo_mensaje_inicio(self, query):
-        keyboard = [
-            [InlineKeyboardButton("🏛️ Ver Auditorios", callback_data="ver_auditorios")],
-            [InlineKeyboardButton("📅 Mis Reservas", callback_data="mis_reservas")],
-            [InlineKeyboardButton("ℹ️ Ayuda", callback_data="ayuda")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        image_url = "https://cv-cristian-cabana.s3.us-east-1.amazonaws.com/bot.JPG"
-        
-        await query.message.reply_photo(
-            photo=image_url,
-            caption=f"¡Hola {query.from_user.first_name}! 👋\n\n"
-                   "Bienvenido al sistema de reservas de auditorios.\n"
-                   "¿Qué te gustaría hacer?",
-            reply_markup=reply_markup
+        await self.media.enviar_foto(
+            query.message.reply_photo,
+            'bienvenida',
+            caption=views.caption_bienvenida(query.from_user.first_name),
+            reply_markup=views.MENU_PRINCIPAL
         )
@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+from telegram.error import BadRequest
+
+# Recursos estáticos del bot: nombre -> URL o ruta local
+ASSETS = {
+    'bienvenida': "https://cv-cristian-cabana.s3.us-east-1.amazonaws.com/bot.JPG"
+}
+
+class MediaRegistry:
+    """
+    Reutiliza el file_id que devuelve Telegram para cada recurso estático.
+
+    La primera vez se envía la URL original y se guarda el file_id de la foto
+    enviada; los envíos siguientes usan ese id, sin que Telegram vuelva a
+    descargar la imagen. Si el id deja de ser válido se vuelve a subir.
+    """
+
+    def __init__(self, assets: dict = None, path: str = None):
+        self.assets = assets or ASSETS
+        self.path = path
+        self._lock = threading.Lock()
+        self.file_ids = self._cargar()
+
+    def _cargar(self) -> dict:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error leyendo caché de media: {e}")
+            return {}
+
+    def _guardar(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.file_ids, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Error guardando caché de media: {e}")
+
+    def _registrar(self, nombre: str, mensaje):
+        if mensaje and mensaje.photo:
+            with self._lock:
+                self.file_ids[nombre] = mensaje.photo[-1].file_id
+                self._guardar()
+
+    def _olvidar(self, nombre: str):
+        with self._lock:
+            self.file_ids.pop(nombre, None)
+            self._guardar()
+
+    def _origen(self, nombre: str):
+        origen = self.assets[nombre]
+        if not origen.startswith(('http://', 'https://')):
+            with open(origen, 'rb') as f:
+                return f.read()
+        return origen
+
+    async def enviar_foto(self, enviar, nombre: str, **kwargs):
+        """Enviar la foto `nombre` con `enviar` (p. ej. message.reply_photo)"""
+        file_id = self.file_ids.get(nombre)
+        if file_id:
+            try:
+                return await enviar(photo=file_id, **kwargs)
+            except BadRequest as e:
+                # El id ya no es válido: volver a subir el recurso
+                print(f"file_id inválido para '{nombre}': {e}")
+                self._olvidar(nombre)
+
+        mensaje = await enviar(photo=self._origen(nombre), **kwargs)
+        self._registrar(nombre, mensaje)
+        return mensaje
+
+    async def precargar(self, bot, chat_id: int):
+        """Subir los recursos sin file_id a un chat auxiliar y borrar los mensajes"""
+        for nombre in self.assets:
+            if nombre in self.file_ids:
+                continue
+            try:
+                mensaje = await bot.send_photo(chat_id=chat_id, photo=self._origen(nombre), disable_notification=True)
+                self._registrar(nombre, mensaje)
+                await mensaje.delete()
+            except Exception as e:
+                print(f"Error precargando '{nombre}': {e}")
+
+def crear_media_registry() -> MediaRegistry:
+    return MediaRegistry(path=os.getenv('MEDIA_CACHE_PATH', 'media_cache.json'))
@@ -0,0 +1,191 @@
+import asyncio
+import heapq
+import os
+from datetime import datetime, timedelta
+from database.repositories import EventoRepository
+from database.metrics import REGISTRO
+from bot.send_queue import NOTIFICACION
+
+RECORDATORIOS = REGISTRO.contador(
+    'auditorios_bot_recordatorios_total',
+    'Recordatorios de reservas procesados por el programador',
+    ('resultado',)
+)
+
+class ProgramadorRecordatorios:
+    """
+    Envía un recordatorio `anticipacion` antes del inicio de cada reserva.
+
+    Las reservas se leen por ventanas de tiempo (consulta por rango sobre
+    idx_eventos_recordatorio) y sus avisos se guardan en un min-heap por hora de
+    envío. Antes de enviar, el aviso se reclama en la base con
+    marcar_recordatorio_enviado, de modo que un reinicio u otro proceso no lo
+    repite y una reserva cancelada nunca se notifica.
+
+    Las reservas y cancelaciones hechas en este proceso llegan por
+    EventoRepository.observar; las de otros procesos (la API) se recogen al
+    volver a leer la ventana cargada cada `refresco` segundos.
+    """
+
+    def __init__(self, evento_repo, auditorio_repo, envios, anticipacion: timedelta = timedelta(hours=1),
+                 ventana: timedelta = timedelta(minutes=30), lote: int = 500, refresco: float = 300):
+        self.evento_repo = evento_repo
+        self.auditorio_repo = auditorio_repo
+        self.envios = envios
+        self.anticipacion = anticipacion
+        self.ventana = ventana
+        self.lote = lote
+        self.refresco = refresco
+        self._heap = []          # (envio_en, evento_id)
+        self._pendientes = {}    # evento_id -> (envio_en, evento)
+        self._horizonte = None   # las reservas que empiezan antes ya están cargadas
+        self._ultimo_refresco = None
+        self._loop = None
+        self._despertar = None
+        self._tarea = None
+
+    async def iniciar(self):
+        self._loop = asyncio.get_running_loop()
+        self._despertar = asyncio.Event()
+        EventoRepository.observar(self._observar)
+        self._tarea = asyncio.create_task(self._ejecutar(), name="recordatorios")
+
+    async def detener(self):
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+        if self._observar in EventoRepository.observadores:
+            EventoRepository.observadores.remove(self._observar)
+
+    # Cambios hechos en este proceso
+
+    def _observar(self, accion: str, datos):
+        # Se llama desde el hilo del executor de base de datos
+        self._loop.call_soon_threadsafe(self._aplicar, accion, datos)
+
+    def _aplicar(self, accion: str, datos):
+        if accion == 'cancelado':
+            for evento_id in datos:
+                self._pendientes.pop(evento_id, None)
+        elif accion == 'reservado' and self._horizonte is not None:
+            ahora = datetime.now()
+            for evento_id, evento in datos:
+                inicio = datetime.combine(evento.fecha.date(), evento.hora_inicio.time())
+                # Las que empiezan después del horizonte llegarán con su ventana
+                if evento_id is not None and ahora < inicio < self._horizonte:
+                    self._agregar(evento.model_copy(update={'id': evento_id, 'hora_inicio': inicio}), inicio)
+        self._despertar.set()
+
+    def _agregar(self, evento, inicio: datetime):
+        if evento.id in self._pendientes:
+            return
+        envio_en = inicio - self.anticipacion
+        self._pendientes[evento.id] = (envio_en, evento)
+        heapq.heappush(self._heap, (envio_en, evento.id))
+
+    # Carga por ventanas
+
+    async def _cargar(self, desde: datetime, hasta: datetime):
+        """Agregar al heap las reservas que empiezan en [desde, hasta), por lotes"""
+        despues_de = None
+        while True:
+            eventos = await self.evento_repo.obtener_recordatorios_pendientes(desde, hasta, despues_de, self.lote)
+            for evento in eventos:
+                self._agregar(evento, evento.hora_inicio)
+            if len(eventos) < self.lote:
+                return
+            ultimo = eventos[-1]
+            despues_de = (ultimo.fecha.date(), ultimo.hora_inicio.time(), ultimo.id)
+
+    async def _avanzar(self, ahora: datetime):
+        if self._horizonte is None:
+            self._horizonte = ahora
+            self._ultimo_refresco = ahora
+        elif (ahora - self._ultimo_refresco).total_seconds() >= self.refresco:
+            await self._cargar(ahora, self._horizonte)
+            self._ultimo_refresco = ahora
+        # Mantener cargado hasta `anticipacion + ventana` por delante
+        hasta = ahora + self.anticipacion + self.ventana
+        if self._horizonte < hasta - self.ventana / 2:
+            await self._cargar(self._horizonte, hasta)
+            self._horizonte = hasta
+
+    # Envío
+
+    async def _enviar(self, evento):
+        if not await self.evento_repo.marcar_recordatorio_enviado(evento.id):
+            # Cancelada desde otro proceso o ya enviada por otra instancia
+            RECORDATORIOS.incrementar('omitido')
+            return
+        auditorio = await self.auditorio_repo.obtener_auditorio(evento.auditorio_id)
+        lugar = f" en {auditorio.nombre}" if auditorio else ""
+        self.envios.programar(
+            evento.usuario_telegram_id,
+            f"⏰ Recordatorio: tu evento \"{evento.nombre_evento}\"{lugar} empieza el "
+            f"{evento.fecha.strftime('%d/%m/%Y')} a las {evento.hora_inicio.strftime('%H:%M')}.",
+            prioridad=NOTIFICACION
+        )
+        RECORDATORIOS.incrementar('enviado')
+
+    async def _enviar_vencidos(self, ahora: datetime):
+        while self._heap and self._heap[0][0] <= ahora:
+            envio_en, evento_id = heapq.heappop(self._heap)
+            pendiente = self._pendientes.get(evento_id)
+            if pendiente is None or pendiente[0] != envio_en:
+                continue  # cancelada
+            del self._pendientes[evento_id]
+            evento = pendiente[1]
+            if evento.hora_inicio <= ahora:
+                RECORDATORIOS.incrementar('vencido')
+                continue
+            await self._enviar(evento)
+
+    async def _ejecutar(self):
+        while True:
+            try:
+                ahora = datetime.now()
+                await self._avanzar(ahora)
+                await self._enviar_vencidos(ahora)
+
+                # Dormir hasta el próximo aviso, la próxima ventana o el próximo refresco
+                proximo = min(
+                    self._horizonte - self.anticipacion - self.ventana / 2,
+                    self._ultimo_refresco + timedelta(seconds=self.refresco)
+                )
+                if self._heap:
+                    proximo = min(proximo, self._heap[0][0])
+                espera = max(0.0, (proximo - datetime.now()).total_seconds())
+                self._despertar.clear()
+                try:
+                    await asyncio.wait_for(self._despertar.wait(), espera)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error en el programador de recordatorios: {e}")
+                await asyncio.sleep(5)
+
+    def info(self):
+        return {
+            'pendientes': len(self._pendientes),
+            'horizonte': self._horizonte.isoformat() if self._horizonte else None
+        }
+
+def crear_programador(evento_repo, auditorio_repo, envios):
+    """Programador configurado por variables de entorno, o None si RECORDATORIOS=false"""
+    if os.getenv('RECORDATORIOS', 'true').lower() not in ('1', 'true', 'yes'):
+        return None
+    return ProgramadorRecordatorios(
+        evento_repo,
+        auditorio_repo,
+        envios,
+        anticipacion=timedelta(minutes=float(os.getenv('RECORDATORIOS_ANTICIPACION', '60'))),
+        ventana=timedelta(minutes=float(os.getenv('RECORDATORIOS_VENTANA', '30'))),
+        lote=int(os.getenv('RECORDATORIOS_LOTE', '500')),
+        refresco=float(os.getenv('RECORDATORIOS_REFRESCO', '300'))
+    )
@@ -0,0 +1,377 @@
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from telegram import TelegramObject
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+from database.metrics import REGISTRO
+
+# Prioridades (menor = antes). Las respuestas de los handlers no indican
+# rate_limit_args y se tratan como interactivas.
+INTERACTIVA = 0
+NOTIFICACION = 5
+MASIVA = 10
+
+# Endpoints que no cuentan para los límites por chat y deben salir sin esperar
+SIN_COLA = {'answerCallbackQuery', 'getMe', 'getUpdates', 'setWebhook', 'deleteWebhook', 'close', 'logOut'}
+
+ENVIOS = REGISTRO.contador(
+    'auditorios_bot_envios_total',
+    'Solicitudes enviadas a Telegram a través de la cola de envíos',
+    ('prioridad', 'resultado')
+)
+
+ESPERA_COLA = REGISTRO.histograma(
+    'auditorios_bot_envios_espera_segundos',
+    'Tiempo que una solicitud pasa en la cola de envíos antes de salir',
+    ('prioridad',)
+)
+
+def _nombre_prioridad(prioridad: int) -> str:
+    if prioridad <= INTERACTIVA:
+        return 'interactiva'
+    if prioridad < MASIVA:
+        return 'notificacion'
+    return 'masiva'
+
+class _Cubeta:
+    __slots__ = ('capacidad', 'recarga', 'tokens', 'actualizado')
+
+    def __init__(self, capacidad: float, recarga: float, ahora: float):
+        self.capacidad = capacidad
+        self.recarga = recarga
+        self.tokens = capacidad
+        self.actualizado = ahora
+
+    def espera(self, ahora: float) -> float:
+        """Segundos hasta que haya un token disponible (0 si ya lo hay)"""
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self.actualizado) * self.recarga)
+        self.actualizado = ahora
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.recarga
+
+    def consumir(self):
+        self.tokens -= 1
+
+class _Solicitud:
+    __slots__ = ('prioridad', 'orden', 'chat_id', 'callback', 'args', 'kwargs', 'futuro', 'intentos', 'encolada')
+
+    def __init__(self, prioridad, orden, chat_id, callback, args, kwargs, futuro):
+        self.prioridad = prioridad
+        self.orden = orden
+        self.chat_id = chat_id
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        self.futuro = futuro
+        self.intentos = 0
+        self.encolada = time.monotonic()
+
+    def __lt__(self, otra):
+        return (self.prioridad, self.orden) < (otra.prioridad, otra.orden)
+
+class AlmacenEnvios:
+    """Envíos programados pendientes, persistidos en SQLite para sobrevivir a un reinicio"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS envios (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chat_id INTEGER NOT NULL,
+                prioridad INTEGER NOT NULL,
+                datos TEXT NOT NULL,
+                creado REAL NOT NULL
+            )
+        """)
+
+    def guardar(self, chat_id: int, prioridad: int, datos: dict) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "INSERT INTO envios (chat_id, prioridad, datos, creado) VALUES (?, ?, ?, ?)",
+                (chat_id, prioridad, json.dumps(datos, ensure_ascii=False), time.time())
+            ).lastrowid
+
+    def eliminar(self, envio_id: int):
+        with self._lock:
+            self._conn.execute("DELETE FROM envios WHERE id = ?", (envio_id,))
+
+    def pendientes(self):
+        with self._lock:
+            filas = self._conn.execute(
+                "SELECT id, chat_id, prioridad, datos FROM envios ORDER BY prioridad, id"
+            ).fetchall()
+        return [(fila[0], fila[1], fila[2], json.loads(fila[3])) for fila in filas]
+
+class ColaEnvios(BaseRateLimiter):
+    """
+    Cola de salida hacia la API de Telegram, usada como rate_limiter de la aplicación.
+
+    Todas las solicitudes del bot pasan por aquí: se ordenan por prioridad y se
+    despachan respetando un token bucket global (30 mensajes/s por defecto) y uno
+    por chat (más estricto en grupos). Ante un RetryAfter se pausa todo el envío
+    el tiempo indicado y la solicitud se reintenta en su mismo lugar de la cola.
+
+    Los envíos masivos se hacen con programar(), que no espera el resultado y,
+    si hay almacén configurado, persiste el mensaje hasta que Telegram lo acepta.
+    """
+
+    def __init__(self, global_por_segundo: float = 30, chat_por_segundo: float = 1, chat_rafaga: float = 3,
+                 grupo_por_minuto: float = 20, max_reintentos: int = 3, max_chats: int = 10000,
+                 almacen: AlmacenEnvios = None):
+        self.global_por_segundo = global_por_segundo
+        self.chat_por_segundo = chat_por_segundo
+        self.chat_rafaga = chat_rafaga
+        self.grupo_por_minuto = grupo_por_minuto
+        self.max_reintentos = max_reintentos
+        self.max_chats = max_chats
+        self.almacen = almacen
+        self.bot = None
+        self._global = _Cubeta(global_por_segundo, global_por_segundo, time.monotonic())
+        self._cubetas = OrderedDict()
+        self._chats = {}       # chat_id -> heap de solicitudes pendientes
+        self._listos = []      # heap de (prioridad, orden, chat_id) de chats con token disponible
+        self._esperando = []   # heap de (listo_en, chat_id) de chats sin token
+        self._bloqueados = set()
+        self._orden = itertools.count()
+        self._pausa_hasta = 0.0
+        self._evento = None
+        self._despachador = None
+        self._tareas = set()
+        self.stats = {'enviadas': 0, 'retry_after': 0, 'descartadas': 0}
+
+    async def initialize(self):
+        if self._despachador is None:
+            self._evento = asyncio.Event()
+            self._despachador = asyncio.create_task(self._despachar(), name="cola_envios")
+
+    async def shutdown(self):
+        if self._despachador is not None:
+            self._despachador.cancel()
+            try:
+                await self._despachador
+            except asyncio.CancelledError:
+                pass
+            self._despachador = None
+        # Los envíos persistidos que no salieron se reanudan en el próximo arranque
+        for tarea in list(self._tareas):
+            tarea.cancel()
+
+    async def iniciar(self, bot):
+        """Asociar el bot (para programar()) y reanudar los envíos persistidos"""
+        self.bot = bot
+        if self.almacen is None:
+            return
+        pendientes = await asyncio.get_running_loop().run_in_executor(None, self.almacen.pendientes)
+        for envio_id, chat_id, prioridad, datos in pendientes:
+            self._lanzar(self._enviar_programado(envio_id, chat_id, prioridad, datos))
+        if pendientes:
+            print(f"📨 {len(pendientes)} envíos pendientes reanudados")
+
+    # Encolado
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        chat_id = data.get('chat_id')
+        if endpoint in SIN_COLA or chat_id is None:
+            return await self._directo(callback, args, kwargs)
+
+        prioridad = INTERACTIVA if rate_limit_args is None else int(rate_limit_args)
+        futuro = asyncio.get_running_loop().create_future()
+        self._encolar(_Solicitud(prioridad, next(self._orden), chat_id, callback, args, kwargs, futuro))
+        return await futuro
+
+    async def _directo(self, callback, args, kwargs):
+        for intento in range(self.max_reintentos + 1):
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                self.stats['retry_after'] += 1
+                if intento == self.max_reintentos:
+                    raise
+                await asyncio.sleep(e.retry_after)
+
+    def _encolar(self, solicitud: _Solicitud):
+        chat_id = solicitud.chat_id
+        cola = self._chats.get(chat_id)
+        if cola is None:
+            cola = self._chats[chat_id] = []
+        heapq.heappush(cola, solicitud)
+        if chat_id not in self._bloqueados and cola[0] is solicitud:
+            self._programar_chat(chat_id, time.monotonic())
+        self._evento.set()
+
+    def _cubeta(self, chat_id, ahora: float) -> _Cubeta:
+        cubeta = self._cubetas.get(chat_id)
+        if cubeta is None:
+            # chat_id negativo = grupo o canal, con un límite por minuto
+            if isinstance(chat_id, int) and chat_id < 0:
+                cubeta = _Cubeta(1, self.grupo_por_minuto / 60, ahora)
+            else:
+                cubeta = _Cubeta(self.chat_rafaga, self.chat_por_segundo, ahora)
+            self._cubetas[chat_id] = cubeta
+            if len(self._cubetas) > self.max_chats:
+                self._cubetas.popitem(last=False)
+        else:
+            self._cubetas.move_to_end(chat_id)
+        return cubeta
+
+    def _programar_chat(self, chat_id, ahora: float):
+        """Poner la cabeza de la cola del chat en _listos o, si no tiene token, en _esperando"""
+        cola = self._chats.get(chat_id)
+        if not cola:
+            self._chats.pop(chat_id, None)
+            return
+        espera = self._cubeta(chat_id, ahora).espera(ahora)
+        if espera > 0:
+            self._bloqueados.add(chat_id)
+            heapq.heappush(self._esperando, (ahora + espera, chat_id))
+        else:
+            cabeza = cola[0]
+            heapq.heappush(self._listos, (cabeza.prioridad, cabeza.orden, chat_id))
+
+    # Despacho
+
+    def _liberar(self, ahora: float):
+        while self._esperando and self._esperando[0][0] <= ahora:
+            _, chat_id = heapq.heappop(self._esperando)
+            self._bloqueados.discard(chat_id)
+            self._programar_chat(chat_id, ahora)
+
+    def _siguiente(self):
+        """Chat con la solicitud más prioritaria lista para salir (descarta entradas obsoletas)"""
+        while self._listos:
+            prioridad, orden, chat_id = self._listos[0]
+            cola = self._chats.get(chat_id)
+            if cola and cola[0].orden == orden and chat_id not in self._bloqueados:
+                return chat_id
+            heapq.heappop(self._listos)
+        return None
+
+    async def _dormir(self, segundos):
+        self._evento.clear()
+        try:
+            await asyncio.wait_for(self._evento.wait(), segundos)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _despachar(self):
+        while True:
+            ahora = time.monotonic()
+            if self._pausa_hasta > ahora:
+                await asyncio.sleep(self._pausa_hasta - ahora)
+                continue
+            self._liberar(ahora)
+
+            chat_id = self._siguiente()
+            if chat_id is None:
+                await self._dormir(self._esperando[0][0] - ahora if self._esperando else None)
+                continue
+
+            espera = self._global.espera(ahora)
+            if espera > 0:
+                # Al despertar se vuelve a elegir: puede haber llegado algo más prioritario
+                await asyncio.sleep(espera)
+                continue
+
+            heapq.heappop(self._listos)
+            solicitud = heapq.heappop(self._chats[chat_id])
+            if solicitud.futuro.done():
+                # El handler que la esperaba fue cancelado
+                self.stats['descartadas'] += 1
+                self._programar_chat(chat_id, ahora)
+                continue
+            self._global.consumir()
+            self._cubeta(chat_id, ahora).consumir()
+            self._programar_chat(chat_id, ahora)
+            self._lanzar(self._ejecutar(solicitud))
+
+    def _lanzar(self, corrutina):
+        tarea = asyncio.create_task(corrutina)
+        self._tareas.add(tarea)
+        tarea.add_done_callback(self._tareas.discard)
+        return tarea
+
+    async def _ejecutar(self, solicitud: _Solicitud):
+        nombre = _nombre_prioridad(solicitud.prioridad)
+        if solicitud.intentos == 0:
+            ESPERA_COLA.observar(time.monotonic() - solicitud.encolada, nombre)
+        try:
+            resultado = await solicitud.callback(*solicitud.args, **solicitud.kwargs)
+        except RetryAfter as e:
+            self.stats['retry_after'] += 1
+            ENVIOS.incrementar(nombre, 'retry_after')
+            # El límite de Telegram es por bot: se pausa toda la cola
+            self._pausa_hasta = max(self._pausa_hasta, time.monotonic() + e.retry_after)
+            solicitud.intentos += 1
+            if solicitud.intentos > self.max_reintentos:
+                if not solicitud.futuro.done():
+                    solicitud.futuro.set_exception(e)
+                return
+            # Mismo orden: vuelve a salir antes que lo encolado después
+            self._encolar(solicitud)
+        except Exception as e:
+            ENVIOS.incrementar(nombre, 'error')
+            if not solicitud.futuro.done():
+                solicitud.futuro.set_exception(e)
+        else:
+            self.stats['enviadas'] += 1
+            ENVIOS.incrementar(nombre, 'ok')
+            if not solicitud.futuro.done():
+                solicitud.futuro.set_result(resultado)
+
+    # Envíos programados
+
+    def programar(self, chat_id: int, texto: str, prioridad: int = MASIVA, **kwargs):
+        """
+        Encolar un send_message sin esperar su resultado (avisos, difusiones).
+        Con almacén configurado el mensaje se persiste hasta que Telegram lo acepta.
+        """
+        datos = {'text': texto}
+        for clave, valor in kwargs.items():
+            datos[clave] = valor.to_dict() if isinstance(valor, TelegramObject) else valor
+        envio_id = self.almacen.guardar(chat_id, prioridad, datos) if self.almacen is not None else None
+        return self._lanzar(self._enviar_programado(envio_id, chat_id, prioridad, datos))
+
+    async def _enviar_programado(self, envio_id, chat_id: int, prioridad: int, datos: dict):
+        try:
+            await self.bot.send_message(chat_id=chat_id, rate_limit_args=prioridad, **datos)
+        except asyncio.CancelledError:
+            raise
+        except RetryAfter as e:
+            # Agotó los reintentos: queda persistido para el próximo arranque
+            print(f"Error enviando mensaje a {chat_id}: {e}")
+            return
+        except Exception as e:
+            # Errores permanentes (chat bloqueado, mensaje inválido): no reintentar
+            print(f"Error enviando mensaje a {chat_id}: {e}")
+        if envio_id is not None:
+            self.almacen.eliminar(envio_id)
+
+    def info(self):
+        return {
+            'pendientes': sum(len(cola) for cola in self._chats.values()),
+            'chats_pendientes': len(self._chats),
+            'chats_en_espera': len(self._bloqueados),
+            'en_pausa': max(0.0, self._pausa_hasta - time.monotonic()),
+            **self.stats
+        }
+
+def crear_cola_envios() -> ColaEnvios:
+    """Cola de envíos configurada por variables de entorno"""
+    path = os.getenv('ENVIOS_SQLITE_PATH')
+    return ColaEnvios(
+        global_por_segundo=float(os.getenv('ENVIOS_GLOBAL_POR_SEGUNDO', '30')),
+        chat_por_segundo=float(os.getenv('ENVIOS_CHAT_POR_SEGUNDO', '1')),
+        chat_rafaga=float(os.getenv('ENVIOS_CHAT_RAFAGA', '3')),
+        grupo_por_minuto=float(os.getenv('ENVIOS_GRUPO_POR_MINUTO', '20')),
+        max_reintentos=int(os.getenv('ENVIOS_MAX_REINTENTOS', '3')),
+        almacen=AlmacenEnvios(path) if path else None
+    )
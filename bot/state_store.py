@@ -0,0 +1,189 @@
+import json
+import os
+import sqlite3
+import threading
+import time as _time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import date, time
+
+def _codificar(valor):
+    if isinstance(valor, date):
+        return {'$d': valor.isoformat()}
+    if isinstance(valor, time):
+        return {'$t': valor.strftime('%H:%M')}
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+def _decodificar(obj):
+    if '$d' in obj:
+        return date.fromisoformat(obj['$d'])
+    if '$t' in obj:
+        return time.fromisoformat(obj['$t'])
+    return obj
+
+def serializar(estado: dict) -> str:
+    return json.dumps(estado, default=_codificar, separators=(',', ':'), ensure_ascii=False)
+
+def deserializar(texto: str) -> dict:
+    return json.loads(texto, object_hook=_decodificar)
+
+class StateStore(ABC):
+    """Almacén de estados de conversación con expiración y tamaño máximo"""
+
+    def __init__(self, ttl: float = 1800, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {'evictions': 0, 'expirations': 0}
+
+    @abstractmethod
+    def get(self, user_id: int):
+        ...
+
+    @abstractmethod
+    def set(self, user_id: int, estado: dict):
+        ...
+
+    @abstractmethod
+    def delete(self, user_id: int):
+        ...
+
+    @abstractmethod
+    def size(self) -> int:
+        ...
+
+    def __contains__(self, user_id):
+        return self.get(user_id) is not None
+
+    def __getitem__(self, user_id):
+        estado = self.get(user_id)
+        if estado is None:
+            raise KeyError(user_id)
+        return estado
+
+    def __setitem__(self, user_id, estado):
+        self.set(user_id, estado)
+
+    def __delitem__(self, user_id):
+        self.delete(user_id)
+
+    def info(self):
+        return {
+            'backend': type(self).__name__,
+            'size': self.size(),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            **self.stats
+        }
+
+class MemoryStateStore(StateStore):
+    """Estados en memoria del proceso, con desalojo LRU"""
+
+    def __init__(self, ttl: float = 1800, max_entries: int = 10000):
+        super().__init__(ttl, max_entries)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int):
+        with self._lock:
+            entrada = self._data.get(user_id)
+            if entrada is None:
+                return None
+            expira, estado = entrada
+            if expira <= _time.monotonic():
+                del self._data[user_id]
+                self.stats['expirations'] += 1
+                return None
+            self._data.move_to_end(user_id)
+            return estado
+
+    def set(self, user_id: int, estado: dict):
+        with self._lock:
+            self._data[user_id] = (_time.monotonic() + self.ttl, estado)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def delete(self, user_id: int):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def size(self) -> int:
+        return len(self._data)
+
+class SQLiteStateStore(StateStore):
+    """Estados persistidos en un archivo SQLite local, compartible entre procesos del bot"""
+
+    def __init__(self, path: str, ttl: float = 1800, max_entries: int = 10000):
+        super().__init__(ttl, max_entries)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS estados (
+                user_id INTEGER PRIMARY KEY,
+                datos TEXT NOT NULL,
+                expira REAL NOT NULL,
+                actualizado REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_estados_actualizado ON estados (actualizado)")
+
+    def get(self, user_id: int):
+        ahora = _time.time()
+        with self._lock:
+            fila = self._conn.execute(
+                "SELECT datos, expira FROM estados WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if fila is None:
+                return None
+            if fila[1] <= ahora:
+                self._conn.execute("DELETE FROM estados WHERE user_id = ?", (user_id,))
+                self.stats['expirations'] += 1
+                return None
+            # Leer también cuenta como uso para el desalojo LRU, igual que en memoria
+            self._conn.execute("UPDATE estados SET actualizado = ? WHERE user_id = ?", (ahora, user_id))
+        return deserializar(fila[0])
+
+    def set(self, user_id: int, estado: dict):
+        ahora = _time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO estados (user_id, datos, expira, actualizado) VALUES (?, ?, ?, ?)",
+                    (user_id, serializar(estado), ahora + self.ttl, ahora)
+                )
+                # Limpiar expirados y desalojar los menos recientes si se supera el máximo
+                expirados = self._conn.execute("DELETE FROM estados WHERE expira <= ?", (ahora,)).rowcount
+                self.stats['expirations'] += expirados
+                exceso = self._conn.execute("SELECT COUNT(*) FROM estados").fetchone()[0] - self.max_entries
+                if exceso > 0:
+                    self._conn.execute("""
+                        DELETE FROM estados WHERE user_id IN (
+                            SELECT user_id FROM estados ORDER BY actualizado LIMIT ?
+                        )
+                    """, (exceso,))
+                    self.stats['evictions'] += exceso
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, user_id: int):
+        with self._lock:
+            self._conn.execute("DELETE FROM estados WHERE user_id = ?", (user_id,))
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM estados").fetchone()[0]
+
+def crear_state_store() -> StateStore:
+    """Crear el almacén de estados según ESTADOS_BACKEND (memoria o sqlite)"""
+    ttl = float(os.getenv('ESTADOS_TTL', '1800'))
+    max_entries = int(os.getenv('ESTADOS_MAX', '10000'))
+    backend = os.getenv('ESTADOS_BACKEND', 'memoria').lower()
+    if backend == 'sqlite':
+        return SQLiteStateStore(os.getenv('ESTADOS_SQLITE_PATH', 'estados.db'), ttl, max_entries)
+    return MemoryStateStore(ttl, max_entries)
@@ -0,0 +1,61 @@
+import asyncio
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Procesa actualizaciones en paralelo manteniendo el orden por usuario.
+
+    Una actualización nunca adelanta a otra anterior del mismo usuario, así el
+    flujo de reserva de handle_message ve los mensajes en el orden enviado.
+    Las actualizaciones que esperan su turno no ocupan un hueco de trabajo.
+    """
+
+    def __init__(self, max_concurrent_updates: int, max_pending_updates: int = None):
+        # El semáforo de la clase base limita las actualizaciones en curso o en espera
+        super().__init__(max_pending_updates or max_concurrent_updates * 16)
+        self.workers = max_concurrent_updates
+        self._workers = asyncio.Semaphore(max_concurrent_updates)
+        self._user_locks = {}
+        self._pending = {}
+
+    @staticmethod
+    def _clave(update):
+        if isinstance(update, Update):
+            if update.effective_user:
+                return update.effective_user.id
+            if update.effective_chat:
+                return update.effective_chat.id
+        return None
+
+    async def do_process_update(self, update, coroutine):
+        clave = self._clave(update)
+        if clave is None:
+            async with self._workers:
+                await coroutine
+            return
+
+        lock = self._user_locks.setdefault(clave, asyncio.Lock())
+        self._pending[clave] = self._pending.get(clave, 0) + 1
+        try:
+            async with lock:
+                async with self._workers:
+                    await coroutine
+        finally:
+            self._pending[clave] -= 1
+            if not self._pending[clave]:
+                del self._pending[clave]
+                del self._user_locks[clave]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def info(self):
+        return {
+            'workers': self.workers,
+            'usuarios_en_cola': len(self._pending),
+            'actualizaciones_en_cola': sum(self._pending.values())
+        }
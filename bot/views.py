@@ -0,0 +1,146 @@
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from database.cache import TTLCache
+from database.metrics import REGISTRO
+
+# Pantallas estáticas: se construyen una sola vez al importar el módulo
+
+MENU_PRINCIPAL = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🏛️ Ver Auditorios", callback_data="ver_auditorios")],
+    [InlineKeyboardButton("🔎 Horarios Libres", callback_data="horarios_libres")],
+    [InlineKeyboardButton("📅 Mis Reservas", callback_data="mis_reservas")],
+    [InlineKeyboardButton("ℹ️ Ayuda", callback_data="ayuda")]
+])
+
+VOLVER_INICIO = InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Volver", callback_data="volver_inicio")]])
+
+CAPTION_MENU = ("🏛️ **Sistema de Reservas de Auditorios**\n\n"
+                "¿Qué te gustaría hacer?")
+
+TEXTO_AYUDA = """
+ℹ️ **Ayuda - Sistema de Reservas**
+
+**Funciones disponibles:**
+
+🏛️ **Ver Auditorios**
+- Consulta todos los auditorios disponibles
+- Ve información detallada de cada uno
+- Consulta disponibilidad y eventos
+
+📅 **Disponibilidad**
+- Verifica horarios libres
+- Ve eventos programados
+- Planifica tu reserva
+
+➕ **Hacer Reserva**
+- Reserva un auditorio
+- Especifica fecha y horario
+- Añade descripción del evento
+
+📋 **Mis Reservas**
+- Ve todas tus reservas activas
+- Cancela reservas que creaste
+- Gestiona tus eventos
+
+**Formato de datos:**
+- Fecha: DD/MM/YYYY (ej: 15/12/2024)
+- Hora: HH:MM (ej: 14:30)
+
+**Notas importantes:**
+- Solo puedes cancelar reservas que tú creaste
+- No se pueden hacer reservas en fechas pasadas
+- La hora de fin debe ser posterior a la de inicio
+        """
+
+TEXTO_AYUDA_BREVE = ("ℹ️ *Ayuda del Bot*\n\n"
+                     "Aquí están los comandos disponibles:\n\n"
+                     "🏛️ *Ver Auditorios*\n"
+                     "- Muestra la lista de auditorios disponibles\n"
+                     "- Permite ver detalles y hacer reservas\n\n"
+                     "📅 *Mis Reservas*\n"
+                     "- Muestra tus reservas activas\n"
+                     "- Permite cancelar reservas\n\n"
+                     "Para hacer una reserva:\n"
+                     "1. Selecciona 'Ver Auditorios'\n"
+                     "2. Elige el auditorio deseado\n"
+                     "3. Selecciona 'Reservar'\n"
+                     "4. Sigue las instrucciones\n\n"
+                     "Para cancelar una reserva:\n"
+                     "1. Selecciona 'Mis Reservas'\n"
+                     "2. Elige 'Cancelar' en la reserva deseada")
+
+TEXTO_AUDITORIOS = ("📋 **Auditorios Disponibles**\n\n"
+                    "Selecciona un auditorio para ver sus opciones:")
+
+def caption_bienvenida(nombre: str) -> str:
+    return (f"¡Hola {nombre}! 👋\n\n"
+            "Bienvenido al sistema de reservas de auditorios.\n"
+            "¿Qué te gustaría hacer?")
+
+# Pantallas derivadas del catálogo, memorizadas por versión del catálogo
+_vistas = TTLCache(ttl=86400, max_entries=512)
+
+def teclado_auditorios(auditorios, version: int) -> InlineKeyboardMarkup:
+    clave = ('auditorios', version)
+    markup = _vistas.get(clave)
+    if markup is None:
+        keyboard = [
+            [InlineKeyboardButton(
+                f"🏛️ {auditorio.nombre} ({auditorio.capacidad} personas)",
+                callback_data=f"auditorio_{auditorio.id}"
+            )]
+            for auditorio in auditorios
+        ]
+        keyboard.append([InlineKeyboardButton("⬅️ Volver", callback_data="volver_inicio")])
+        markup = InlineKeyboardMarkup(keyboard)
+        _vistas.set(clave, markup)
+    return markup
+
+def vista_opciones_auditorio(auditorio):
+    """Texto y teclado de la ficha de un auditorio, memorizados por su contenido"""
+    clave = ('opciones', auditorio.id, auditorio.nombre, auditorio.ubicacion,
+             auditorio.capacidad, auditorio.descripcion)
+    vista = _vistas.get(clave)
+    if vista is None:
+        auditorio_id = auditorio.id
+        markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("📅 Ver Disponibilidad", callback_data=f"disponibilidad_{auditorio_id}")],
+            [InlineKeyboardButton("🎭 Ver Eventos", callback_data=f"eventos_{auditorio_id}")],
+            [InlineKeyboardButton("➕ Hacer Reserva", callback_data=f"reservar_{auditorio_id}")],
+            [InlineKeyboardButton("⬅️ Volver", callback_data="ver_auditorios")]
+        ])
+
+        text = f"🏛️ **{auditorio.nombre}**\n\n"
+        text += f"📍 **Ubicación:** {auditorio.ubicacion}\n"
+        text += f"👥 **Capacidad:** {auditorio.capacidad} personas\n"
+        if auditorio.descripcion:
+            text += f"📝 **Descripción:** {auditorio.descripcion}\n"
+        text += "\n¿Qué te gustaría hacer?"
+
+        vista = (text, markup)
+        _vistas.set(clave, vista)
+    return vista
+
+def teclado_auditorio(auditorio_id: int) -> InlineKeyboardMarkup:
+    """Teclado 'Hacer Reserva' / 'Volver' de las vistas de disponibilidad y eventos"""
+    clave = ('acciones', auditorio_id)
+    markup = _vistas.get(clave)
+    if markup is None:
+        markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("➕ Hacer Reserva", callback_data=f"reservar_{auditorio_id}")],
+            [InlineKeyboardButton("⬅️ Volver", callback_data=f"auditorio_{auditorio_id}")]
+        ])
+        _vistas.set(clave, markup)
+    return markup
+
+def info():
+    return _vistas.info()
+
+@REGISTRO.recolector
+def _metricas_vistas():
+    vistas = info()
+    return [
+        ('auditorios_bot_vistas_entradas', 'gauge', 'Teclados y textos memorizados por el bot',
+         [({}, vistas['size'])]),
+        ('auditorios_bot_vistas_consultas_total', 'counter', 'Consultas a las vistas memorizadas',
+         [({'resultado': 'hit'}, vistas['hits']), ({'resultado': 'miss'}, vistas['misses'])])
+    ]
@@ -0,0 +1,70 @@
+"""
+Archivado de eventos pasados y cancelados en eventos_historico.
+
+Mantiene pequeña la tabla eventos, que recorren las comprobaciones de
+disponibilidad y los listados. Los eventos se mueven en lotes de `lote` filas,
+cada uno en su propia transacción corta, con una pausa entre lotes para no
+competir con las reservas. El bot lo ejecuta cada ARCHIVO_INTERVALO segundos;
+también puede lanzarse a mano:
+
+    python -m database.archivo --retencion-dias 30 --lote 1000
+"""
+import argparse
+import os
+import time
+from datetime import date, timedelta
+from .metrics import REGISTRO
+from .repositories import EventoRepository
+
+ARCHIVADOS = REGISTRO.contador(
+    'auditorios_eventos_archivados_total',
+    'Eventos movidos de eventos a eventos_historico'
+)
+
+def archivar_eventos(repo: EventoRepository = None, retencion_dias: int = 30, lote: int = 1000,
+                     pausa: float = 0.1, max_lotes: int = None) -> int:
+    """
+    Mover los eventos cancelados y los anteriores a hoy - `retencion_dias` hasta
+    vaciar la cola (o hasta `max_lotes` lotes). Devuelve cuántos se movieron.
+    """
+    repo = repo or EventoRepository()
+    antes_de = date.today() - timedelta(days=retencion_dias)
+    total = 0
+    lotes = 0
+    while max_lotes is None or lotes < max_lotes:
+        movidos = repo.archivar_lote(antes_de, lote)
+        lotes += 1
+        total += movidos
+        ARCHIVADOS.incrementar(n=movidos)
+        if movidos < lote:
+            break
+        time.sleep(pausa)
+    return total
+
+def configuracion() -> dict:
+    """Parámetros del archivado según las variables de entorno"""
+    return {
+        'retencion_dias': int(os.getenv('ARCHIVO_RETENCION_DIAS', '30')),
+        'lote': int(os.getenv('ARCHIVO_LOTE', '1000')),
+        'pausa': float(os.getenv('ARCHIVO_PAUSA', '0.1'))
+    }
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+    valores = configuracion()
+    parser = argparse.ArgumentParser(description="Archivar eventos pasados y cancelados")
+    parser.add_argument("--retencion-dias", type=int, default=valores['retencion_dias'])
+    parser.add_argument("--lote", type=int, default=valores['lote'])
+    parser.add_argument("--pausa", type=float, default=valores['pausa'])
+    parser.add_argument("--max-lotes", type=int, default=None)
+    args = parser.parse_args()
+    
+    inicio = time.perf_counter()
+    total = archivar_eventos(
+        retencion_dias=args.retencion_dias, lote=args.lote, pausa=args.pausa, max_lotes=args.max_lotes
+    )
+    print(f"📦 {total} eventos archivados en {time.perf_counter() - inicio:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Optional, Tuple
+from datetime import datetime, date
+from .connection import DatabaseConnection
+from .models import (Auditorio, Evento, EventoDetalle, Usuario, ResultadoReserva, HorarioLibre, PaginaEventos,
+                     ResultadoItemLote, SerieEventos, ResultadoSerie)
+from .repositories import UsuarioRepository, AuditorioRepository, EventoRepository
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ThreadPoolExecutor:
+    """Executor acotado compartido para las consultas bloqueantes"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                pool = DatabaseConnection.get_pool()
+                workers = int(os.getenv('DB_EXECUTOR_WORKERS', pool.size + pool.max_overflow))
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db")
+    return _executor
+
+class AsyncRepository:
+    """Ejecuta los métodos del repositorio síncrono en el executor de base de datos"""
+    
+    def __init__(self, repo):
+        self.repo = repo
+    
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # Copiar el contexto para que las trazas SQL conozcan el handler o endpoint de origen
+        contexto = contextvars.copy_context()
+        return await loop.run_in_executor(get_executor(), partial(contexto.run, func, *args, **kwargs))
+
+class AsyncUsuarioRepository(AsyncRepository):
+    def __init__(self, repo: UsuarioRepository = None):
+        super().__init__(repo or UsuarioRepository())
+    
+    async def crear_usuario(self, telegram_id: int, nombre: str, username: str = None) -> bool:
+        return await self._run(self.repo.crear_usuario, telegram_id, nombre, username)
+    
+    async def obtener_usuario(self, telegram_id: int) -> Optional[Usuario]:
+        return await self._run(self.repo.obtener_usuario, telegram_id)
+
+class AsyncAuditorioRepository(AsyncRepository):
+    def __init__(self, repo: AuditorioRepository = None):
+        super().__init__(repo or AuditorioRepository())
+    
+    @property
+    def version_catalogo(self) -> int:
+        return self.repo.version_catalogo
+    
+    async def obtener_auditorios(self) -> List[Auditorio]:
+        return await self._run(self.repo.obtener_auditorios)
+    
+    async def obtener_auditorios_versionado(self) -> Tuple[List[Auditorio], int]:
+        return await self._run(self.repo.obtener_auditorios_versionado)
+    
+    async def obtener_auditorio(self, auditorio_id: int) -> Optional[Auditorio]:
+        return await self._run(self.repo.obtener_auditorio, auditorio_id)
+
+class AsyncEventoRepository(AsyncRepository):
+    def __init__(self, repo: EventoRepository = None):
+        super().__init__(repo or EventoRepository())
+    
+    def version_eventos(self, auditorio_id: int) -> int:
+        return self.repo.versiones.get(auditorio_id)
+    
+    async def reservar(self, evento: Evento) -> ResultadoReserva:
+        return await self._run(self.repo.reservar, evento)
+    
+    async def reservar_lote(self, eventos: List[Evento]) -> List[ResultadoItemLote]:
+        return await self._run(self.repo.reservar_lote, eventos)
+    
+    async def reservar_serie(self, serie: SerieEventos) -> ResultadoSerie:
+        return await self._run(self.repo.reservar_serie, serie)
+    
+    async def verificar_disponibilidad(self, auditorio_id: int, fecha: date, hora_inicio: datetime, hora_fin: datetime) -> bool:
+        return await self._run(self.repo.verificar_disponibilidad, auditorio_id, fecha, hora_inicio, hora_fin)
+    
+    async def obtener_horarios_libres(self, desde: date, hasta: date, duracion_minima: int = 0) -> List[HorarioLibre]:
+        return await self._run(self.repo.obtener_horarios_libres, desde, hasta, duracion_minima)
+    
+    async def listar_eventos_auditorio(self, auditorio_id: int, **kwargs) -> PaginaEventos:
+        return await self._run(self.repo.listar_eventos_auditorio, auditorio_id, **kwargs)
+    
+    async def listar_eventos_usuario(self, telegram_id: int, **kwargs) -> PaginaEventos:
+        return await self._run(self.repo.listar_eventos_usuario, telegram_id, **kwargs)
+    
+    async def listar_historial_auditorio(self, auditorio_id: int, **kwargs) -> PaginaEventos:
+        return await self._run(self.repo.listar_historial_auditorio, auditorio_id, **kwargs)
+    
+    async def listar_historial_usuario(self, telegram_id: int, **kwargs) -> PaginaEventos:
+        return await self._run(self.repo.listar_historial_usuario, telegram_id, **kwargs)
+    
+    async def archivar_lote(self, antes_de: date, limite: int = 1000) -> int:
+        return await self._run(self.repo.archivar_lote, antes_de, limite)
+    
+    async def obtener_eventos_auditorio(self, auditorio_id: int, fecha: date = None) -> List[EventoDetalle]:
+        return await self._run(self.repo.obtener_eventos_auditorio, auditorio_id, fecha)
+    
+    async def obtener_eventos_usuario(self, telegram_id: int) -> List[EventoDetalle]:
+        return await self._run(self.repo.obtener_eventos_usuario, telegram_id)
+    
+    async def cancelar_evento(self, evento_id: int, telegram_id: int) -> bool:
+        return await self._run(self.repo.cancelar_evento, evento_id, telegram_id)
+    
+    async def cancelar_serie(self, serie_id: int, telegram_id: int) -> int:
+        return await self._run(self.repo.cancelar_serie, serie_id, telegram_id)
+    
+    async def obtener_recordatorios_pendientes(self, desde: datetime, hasta: datetime, despues_de=None,
+                                               limite: int = 500) -> List[Evento]:
+        return await self._run(self.repo.obtener_recordatorios_pendientes, desde, hasta, despues_de, limite)
+    
+    async def marcar_recordatorio_enviado(self, evento_id: int) -> bool:
+        return await self._run(self.repo.marcar_recordatorio_enviado, evento_id)
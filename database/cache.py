@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+class TTLCache:
+    """Caché en memoria con expiración por entrada y tamaño máximo (LRU)"""
+    
+    def __init__(self, ttl: float = 300, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.version = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+    
+    def get(self, key, default=None):
+        return self.get_con_version(key, default)[0]
+    
+    def get_con_version(self, key, default=None):
+        """Como get, pero devuelve (valor, version) leídos bajo el mismo lock"""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                expires, value = item
+                if expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return value, self.version
+                del self._data[key]
+            self.stats['misses'] += 1
+            return default, self.version
+    
+    def peek(self, key, default=None):
+        """Como get, pero sin contar aciertos ni alterar el orden LRU"""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING and item[0] > time.monotonic():
+                return item[1]
+            return default
+    
+    def values(self):
+        with self._lock:
+            now = time.monotonic()
+            return [value for expires, value in self._data.values() if expires > now]
+    
+    def set(self, key, value, nueva_version: bool = False):
+        """
+        Guardar un valor; con nueva_version=True también aumenta `version` (bajo el
+        mismo lock). Devuelve la versión que corresponde al valor guardado.
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            if nueva_version:
+                self.version += 1
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats['evictions'] += 1
+            return self.version
+    
+    def invalidate(self, key=None):
+        """Elimina una clave, o toda la caché si no se indica ninguna"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+            self.version += 1
+            self.stats['invalidations'] += 1
+    
+    def info(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'version': self.version,
+                **self.stats
+            }
+
+class Versiones:
+    """Contadores de versión por clave (p. ej. por auditorio) para invalidar datos derivados"""
+    
+    def __init__(self):
+        self._versiones = {}
+        self._lock = threading.Lock()
+    
+    def get(self, clave) -> int:
+        return self._versiones.get(clave, 0)
+    
+    def incrementar(self, clave):
+        with self._lock:
+            self._versiones[clave] = self._versiones.get(clave, 0) + 1
@@ -1,78 +1,215 @@
 import mysql.connector
 from mysql.connector import Error
 import os
+import queue
+import threading
+import time
 from dotenv import load_dotenv
+from .migrations import aplicar_migraciones
+from .metrics import REGISTRO, POOL_ESPERA
+from .tracing import SQL_TRAZAS, CursorTrazado
 
 load_dotenv()
 
+class PooledConnection:
+    """Envoltura de una conexión MySQL que vuelve al pool al cerrarse"""
+    
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._closed = False
+    
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+    
+    def cursor(self, *args, **kwargs):
+        cursor = self._raw.cursor(*args, **kwargs)
+        return CursorTrazado(cursor, self._raw) if SQL_TRAZAS else cursor
+    
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._pool.release(self._raw)
+
+class ConnectionPool:
+    """Pool de conexiones MySQL compartido por todo el proceso"""
+    
+    def __init__(self, connect_args, size=5, max_overflow=10, timeout=30.0,
+                 recycle=3600, pre_ping=True):
+        self.connect_args = connect_args
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size + max_overflow)
+        self._created_at = {}
+        self._total = 0
+        self.stats = {'checkouts': 0, 'connects': 0, 'recycled': 0, 'invalidated': 0, 'timeouts': 0}
+    
+    def _connect(self):
+        raw = mysql.connector.connect(**self.connect_args)
+        with self._lock:
+            self._created_at[id(raw)] = time.monotonic()
+            self._total += 1
+            self.stats['connects'] += 1
+        return raw
+    
+    def _discard(self, raw):
+        with self._lock:
+            self._created_at.pop(id(raw), None)
+            self._total -= 1
+        try:
+            raw.close()
+        except Error:
+            pass
+    
+    def _is_stale(self, raw):
+        created = self._created_at.get(id(raw))
+        return self.recycle and created is not None and time.monotonic() - created > self.recycle
+    
+    def _is_alive(self, raw):
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+    
+    def acquire(self):
+        inicio = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            self.stats['timeouts'] += 1
+            POOL_ESPERA.observar(time.perf_counter() - inicio, 'timeout')
+            raise Error(msg=f"Tiempo de espera agotado ({self.timeout}s) obteniendo conexión del pool")
+        
+        try:
+            while True:
+                try:
+                    raw = self._idle.get_nowait()
+                except queue.Empty:
+                    raw = self._connect()
+                    break
+                
+                if self._is_stale(raw):
+                    self.stats['recycled'] += 1
+                    self._discard(raw)
+                    continue
+                if self.pre_ping and not self._is_alive(raw):
+                    self.stats['invalidated'] += 1
+                    self._discard(raw)
+                    continue
+                break
+        except Exception:
+            self._slots.release()
+            POOL_ESPERA.observar(time.perf_counter() - inicio, 'error')
+            raise
+        
+        self.stats['checkouts'] += 1
+        POOL_ESPERA.observar(time.perf_counter() - inicio, 'ok')
+        return PooledConnection(self, raw)
+    
+    def release(self, raw):
+        try:
+            # Descartar cualquier transacción que haya quedado abierta
+            if raw.in_transaction:
+                raw.rollback()
+            keep = self._idle.qsize() < self.size and not self._is_stale(raw)
+        except Error:
+            keep = False
+        
+        if keep:
+            self._idle.put(raw)
+        else:
+            self._discard(raw)
+        self._slots.release()
+    
+    def status(self):
+        idle = self._idle.qsize()
+        return {
+            'size': self.size,
+            'max_overflow': self.max_overflow,
+            'total': self._total,
+            'idle': idle,
+            'in_use': self._total - idle,
+            **self.stats
+        }
+    
+    def dispose(self):
+        while True:
+            try:
+                raw = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(raw)
+
 class DatabaseConnection:
+    _pool = None
+    _pool_lock = threading.Lock()
+    
     def __init__(self):
         self.host = os.getenv('MYSQL_HOST')
         self.user = os.getenv('MYSQL_USER')
         self.password = os.getenv('MYSQL_PASSWORD')
         self.database = os.getenv('MYSQL_DATABASE')
-        
+    
+    @classmethod
+    def get_pool(cls) -> ConnectionPool:
+        """Pool compartido por todos los repositorios del proceso"""
+        if cls._pool is None:
+            with cls._pool_lock:
+                if cls._pool is None:
+                    cls._pool = ConnectionPool(
+                        connect_args={
+                            'host': os.getenv('MYSQL_HOST'),
+                            'user': os.getenv('MYSQL_USER'),
+                            'password': os.getenv('MYSQL_PASSWORD'),
+                            'database': os.getenv('MYSQL_DATABASE')
+                        },
+                        size=int(os.getenv('MYSQL_POOL_SIZE', '5')),
+                        max_overflow=int(os.getenv('MYSQL_POOL_MAX_OVERFLOW', '10')),
+                        timeout=float(os.getenv('MYSQL_POOL_TIMEOUT', '30')),
+                        recycle=int(os.getenv('MYSQL_POOL_RECYCLE', '3600')),
+                        pre_ping=os.getenv('MYSQL_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+                    )
+        return cls._pool
+    
     def get_connection(self):
         try:
-            connection = mysql.connector.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                database=self.database
-            )
-            return connection
+            return self.get_pool().acquire()
         except Error as e:
             print(f"Error conectando a MySQL: {e}")
             return None
     
     def create_tables(self):
+        """Crear o actualizar el esquema aplicando las migraciones pendientes"""
         connection = self.get_connection()
         if connection:
-            cursor = connection.cursor()
-            
-            # Tabla usuarios
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS usuarios (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    telegram_id BIGINT UNIQUE NOT NULL,
-                    nombre VARCHAR(255) NOT NULL,
-                    username VARCHAR(255),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Tabla auditorios
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS auditorios (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    nombre VARCHAR(255) NOT NULL,
-                    capacidad INT NOT NULL,
-                    ubicacion VARCHAR(255) NOT NULL,
-                    descripcion TEXT,
-                    activo BOOLEAN DEFAULT TRUE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Tabla eventos
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS eventos (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    auditorio_id INT NOT NULL,
-                    usuario_telegram_id BIGINT NOT NULL,
-                    nombre_evento VARCHAR(255) NOT NULL,
-                    fecha DATE NOT NULL,
-                    hora_inicio TIME NOT NULL,
-                    hora_fin TIME NOT NULL,
-                    descripcion TEXT,
-                    estado ENUM('reservado', 'cancelado') DEFAULT 'reservado',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (auditorio_id) REFERENCES auditorios(id),
-                    FOREIGN KEY (usuario_telegram_id) REFERENCES usuarios(telegram_id)
-                )
-            """)
-            
-            connection.commit()
-            cursor.close()
-            connection.close()
-            print("Tablas creadas exitosamente")
\ No newline at end of file
+            try:
+                version = aplicar_migraciones(connection)
+                print(f"Esquema de base de datos en versión {version}")
+            except Error as e:
+                print(f"Error aplicando migraciones: {e}")
+            finally:
+                connection.close()
+
+@REGISTRO.recolector
+def _metricas_pool():
+    pool = DatabaseConnection._pool
+    if pool is None:
+        return []
+    estado = pool.status()
+    familias = [
+        ('auditorios_db_pool_conexiones', 'gauge', 'Conexiones del pool por estado',
+         [({'estado': e}, estado.get(e, 0)) for e in ('total', 'idle', 'in_use')]),
+        ('auditorios_db_pool_capacidad', 'gauge', 'Tamaño base y desborde máximo del pool',
+         [({'tipo': 'size'}, pool.size), ({'tipo': 'max_overflow'}, pool.max_overflow)])
+    ]
+    for evento in ('checkouts', 'connects', 'recycled', 'invalidated', 'timeouts'):
+        if evento in estado:
+            familias.append((f'auditorios_db_pool_{evento}_total', 'counter',
+                             f'Eventos del pool: {evento}', [({}, estado[evento])]))
+    return familias
\ No newline at end of file
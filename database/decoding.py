@@ -0,0 +1,85 @@
+"""
+Decodificación rápida de filas de nuestro propio esquema.
+
+Las consultas seleccionan columnas explícitas en un orden fijo y usan cursores
+de tuplas; cada fila se desempaqueta por posición y el modelo se construye sin
+la validación de pydantic (los tipos ya vienen de MySQL).
+"""
+from datetime import datetime, time, timedelta
+from .models import Auditorio, EventoDetalle
+
+# Columnas de eventos con los nombres del auditorio y del usuario (en este orden)
+COLUMNAS_EVENTO = """
+    e.id, e.auditorio_id, e.usuario_telegram_id, e.nombre_evento, e.fecha,
+    e.hora_inicio, e.hora_fin, e.descripcion, e.estado, e.created_at,
+    a.nombre, u.nombre
+"""
+
+COLUMNAS_AUDITORIO = "id, nombre, capacidad, ubicacion, descripcion, activo"
+
+_nuevo = object.__new__
+_asignar = object.__setattr__
+
+def construir(cls, valores: dict, campos: set):
+    """
+    Versión reducida de BaseModel.model_construct para filas completas.
+
+    model_construct recorre los campos para aplicar valores por defecto y en
+    pydantic 2.5 resulta más lento que validar; aquí todos los campos vienen
+    de la consulta, así que basta con asignar los atributos internos.
+    """
+    obj = _nuevo(cls)
+    _asignar(obj, '__dict__', valores)
+    # Copia por instancia: model_copy o una asignación posterior modifican este conjunto
+    _asignar(obj, '__pydantic_fields_set__', set(campos))
+    _asignar(obj, '__pydantic_extra__', None)
+    _asignar(obj, '__pydantic_private__', None)
+    return obj
+
+_CAMPOS_EVENTO = set(EventoDetalle.model_fields)
+_CAMPOS_AUDITORIO = set(Auditorio.model_fields)
+
+def to_time(val):
+    """Convertir el valor de una columna TIME (timedelta en mysql.connector) a time"""
+    if isinstance(val, timedelta):
+        segundos = int(val.total_seconds())
+        return time(segundos // 3600, segundos % 3600 // 60, segundos % 60)
+    elif isinstance(val, datetime):
+        return val.time()
+    return val
+
+def _en_fecha(base: datetime, hora):
+    # mysql.connector devuelve TIME como timedelta: sumarlo evita combine()
+    if isinstance(hora, timedelta):
+        return base + hora
+    return datetime.combine(base.date(), to_time(hora))
+
+def fila_a_evento_detalle(fila) -> EventoDetalle:
+    (evento_id, auditorio_id, usuario_telegram_id, nombre_evento, fecha, hora_inicio,
+     hora_fin, descripcion, estado, created_at, auditorio_nombre, usuario_nombre) = fila
+    base = datetime(fecha.year, fecha.month, fecha.day)
+    return construir(EventoDetalle, {
+        'id': evento_id,
+        'auditorio_id': auditorio_id,
+        'usuario_telegram_id': usuario_telegram_id,
+        'nombre_evento': nombre_evento,
+        'fecha': base,
+        'hora_inicio': _en_fecha(base, hora_inicio),
+        'hora_fin': _en_fecha(base, hora_fin),
+        'descripcion': descripcion,
+        'estado': estado,
+        'created_at': created_at,
+        'auditorio_nombre': auditorio_nombre,
+        'usuario_nombre': usuario_nombre
+    }, _CAMPOS_EVENTO)
+
+def fila_a_auditorio(fila) -> Auditorio:
+    auditorio_id, nombre, capacidad, ubicacion, descripcion, activo = fila
+    return construir(Auditorio, {
+        'id': auditorio_id,
+        'nombre': nombre,
+        'capacidad': capacidad,
+        'ubicacion': ubicacion,
+        'descripcion': descripcion,
+        'activo': bool(activo)
+    }, _CAMPOS_AUDITORIO)
@@ -0,0 +1,68 @@
+from datetime import datetime, date, time, timedelta
+from typing import Dict, List, Tuple
+
+def _rango_fechas(desde: date, hasta: date):
+    dia = desde
+    while dia <= hasta:
+        yield dia
+        dia += timedelta(days=1)
+
+def calcular_huecos(
+    auditorio_ids: List[int],
+    ocupados: Dict[Tuple[int, date], List[Tuple[time, time]]],
+    desde: date,
+    hasta: date,
+    apertura: time,
+    cierre: time,
+    duracion_minima: timedelta = timedelta(0),
+    ahora: datetime = None
+) -> List[Tuple[int, date, time, time]]:
+    """
+    Ventanas libres por auditorio y día dentro del horario de apertura.
+    
+    `ocupados` agrupa los intervalos reservados por (auditorio_id, fecha), ya
+    ordenados por hora de inicio, de modo que cada día se resuelve en una pasada.
+    """
+    huecos = []
+    minimo = max(duracion_minima, timedelta(minutes=1))
+    for dia in _rango_fechas(desde, hasta):
+        inicio_dia = datetime.combine(dia, apertura)
+        if ahora and ahora.date() == dia:
+            inicio_dia = max(inicio_dia, ahora.replace(second=0, microsecond=0))
+        fin_dia = datetime.combine(dia, cierre)
+        if ahora and fin_dia <= ahora:
+            continue
+        
+        for auditorio_id in auditorio_ids:
+            cursor = inicio_dia
+            for hora_inicio, hora_fin in ocupados.get((auditorio_id, dia), ()):
+                # Las reservas fuera del horario de atención se recortan a sus límites
+                inicio = min(datetime.combine(dia, hora_inicio), fin_dia)
+                if inicio - cursor >= minimo:
+                    huecos.append((auditorio_id, dia, cursor.time(), inicio.time()))
+                cursor = max(cursor, datetime.combine(dia, hora_fin), inicio_dia)
+                if inicio >= fin_dia or cursor >= fin_dia:
+                    break
+            if fin_dia - cursor >= minimo:
+                huecos.append((auditorio_id, dia, cursor.time(), fin_dia.time()))
+    return huecos
+
+# Días entre ocurrencias de cada frecuencia de recurrencia
+FRECUENCIAS = {'semanal': 7, 'quincenal': 14}
+
+def expandir_recurrencia(primera: date, frecuencia: str, hasta: date, excepciones=(),
+                         max_ocurrencias: int = 104) -> List[date]:
+    """Fechas de una serie desde `primera` hasta `hasta` (inclusive), sin las excepciones"""
+    if frecuencia not in FRECUENCIAS:
+        raise ValueError(f"Frecuencia inválida: {frecuencia} (use {', '.join(FRECUENCIAS)})")
+    if hasta < primera:
+        raise ValueError("La fecha final de la serie debe ser posterior a la primera")
+    
+    paso = timedelta(days=FRECUENCIAS[frecuencia])
+    total = (hasta - primera) // paso + 1
+    if total > max_ocurrencias:
+        raise ValueError(f"La serie admite como máximo {max_ocurrencias} ocurrencias")
+    
+    omitidas = set(excepciones)
+    fechas = (primera + paso * n for n in range(total))
+    return [fecha for fecha in fechas if fecha not in omitidas]
@@ -0,0 +1,132 @@
+import sys
+import threading
+from bisect import bisect_left
+from datetime import date, time, timedelta
+from .cache import TTLCache
+
+def a_minutos(valor) -> int:
+    """Minutos desde medianoche; MySQL devuelve las columnas TIME como timedelta"""
+    if isinstance(valor, timedelta):
+        return int(valor.total_seconds()) // 60
+    return valor.hour * 60 + valor.minute
+
+class IndiceDia:
+    """Reservas de un auditorio en una fecha, ordenadas por hora de inicio"""
+    
+    __slots__ = ('inicios', 'intervalos', 'max_fines')
+    
+    def __init__(self, intervalos):
+        self.intervalos = sorted(intervalos)
+        self.inicios = [inicio for inicio, _, _ in self.intervalos]
+        self.max_fines = []
+        self._recalcular(0)
+    
+    def _recalcular(self, desde: int):
+        # max_fines[i] es el mayor fin entre las reservas 0..i; las reservas
+        # cargadas de la base pueden solaparse, así que no basta con la anterior
+        del self.max_fines[desde:]
+        maximo = self.max_fines[-1] if self.max_fines else -1
+        for _, fin, _ in self.intervalos[desde:]:
+            maximo = max(maximo, fin)
+            self.max_fines.append(maximo)
+    
+    def agregar(self, inicio: int, fin: int, evento_id: int):
+        intervalo = (inicio, fin, evento_id)
+        posicion = bisect_left(self.intervalos, intervalo)
+        self.intervalos.insert(posicion, intervalo)
+        self.inicios.insert(posicion, inicio)
+        self._recalcular(posicion)
+    
+    def quitar(self, evento_id: int):
+        for posicion, (_, _, id_) in enumerate(self.intervalos):
+            if id_ == evento_id:
+                del self.intervalos[posicion]
+                del self.inicios[posicion]
+                self._recalcular(posicion)
+                return
+    
+    def hay_conflicto(self, inicio: int, fin: int) -> bool:
+        # Alguna de las reservas que empiezan antes de `fin` termina después de `inicio`
+        posicion = bisect_left(self.inicios, fin)
+        return posicion > 0 and self.max_fines[posicion - 1] > inicio
+    
+    def conflictos(self, inicio: int, fin: int) -> list:
+        """Ids de las reservas que se solapan con [inicio, fin)"""
+        posicion = bisect_left(self.inicios, fin) - 1
+        ids = []
+        # Retroceder mientras alguna reserva anterior pueda terminar después de `inicio`
+        while posicion >= 0 and self.max_fines[posicion] > inicio:
+            if self.intervalos[posicion][1] > inicio:
+                ids.append(self.intervalos[posicion][2])
+            posicion -= 1
+        ids.reverse()
+        return ids
+    
+    def memoria(self) -> int:
+        return (sys.getsizeof(self.inicios) + sys.getsizeof(self.intervalos) + sys.getsizeof(self.max_fines)
+                + sum(sys.getsizeof(i) for i in self.intervalos))
+
+class IndiceDisponibilidad:
+    """Índice en memoria de intervalos reservados por (auditorio, fecha)"""
+    
+    def __init__(self, ttl: float = 60, max_dias: int = 4096):
+        self.dias = TTLCache(ttl=ttl, max_entries=max_dias)
+        self._lock = threading.Lock()
+    
+    def cargar(self, auditorio_id: int, fecha: date, filas):
+        """Precargar un día a partir de filas (id, hora_inicio, hora_fin)"""
+        dia = IndiceDia((a_minutos(inicio), a_minutos(fin), evento_id) for evento_id, inicio, fin in filas)
+        self.dias.set((auditorio_id, fecha), dia)
+        return dia
+    
+    def cargar_y_consultar(self, auditorio_id: int, fecha: date, filas, hora_inicio: time, hora_fin: time) -> bool:
+        """
+        Cargar un día y responder hay_conflicto con él. Volver a buscarlo en la
+        caché contaría el fallo como acierto.
+        """
+        dia = self.cargar(auditorio_id, fecha, filas)
+        with self._lock:
+            return dia.hay_conflicto(a_minutos(hora_inicio), a_minutos(hora_fin))
+    
+    def hay_conflicto(self, auditorio_id: int, fecha: date, hora_inicio: time, hora_fin: time):
+        """True/False si el día está cargado, None si hay que consultar la base"""
+        dia = self.dias.get((auditorio_id, fecha))
+        if dia is None:
+            return None
+        with self._lock:
+            return dia.hay_conflicto(a_minutos(hora_inicio), a_minutos(hora_fin))
+    
+    def agregar(self, evento_id: int, auditorio_id: int, fecha: date, hora_inicio: time, hora_fin: time):
+        dia = self.dias.peek((auditorio_id, fecha))
+        if dia is not None:
+            with self._lock:
+                dia.agregar(a_minutos(hora_inicio), a_minutos(hora_fin), evento_id)
+    
+    def quitar(self, evento_id: int, auditorio_id: int, fecha: date):
+        dia = self.dias.peek((auditorio_id, fecha))
+        if dia is not None:
+            with self._lock:
+                dia.quitar(evento_id)
+    
+    def invalidar(self, auditorio_id: int = None, fecha: date = None):
+        if auditorio_id is None:
+            self.dias.invalidate()
+        else:
+            self.dias.invalidate((auditorio_id, fecha))
+    
+    def info(self):
+        dias = self.dias.values()
+        with self._lock:
+            intervalos = sum(len(dia.intervalos) for dia in dias)
+            memoria = sum(dia.memoria() for dia in dias)
+        info = self.dias.info()
+        consultas = info['hits'] + info['misses']
+        return {
+            'dias': len(dias),
+            'intervalos': intervalos,
+            'memoria_bytes': memoria,
+            'hits': info['hits'],
+            'misses': info['misses'],
+            'hit_rate': info['hits'] / consultas if consultas else 0.0,
+            'evictions': info['evictions']
+        }
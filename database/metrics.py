@@ -0,0 +1,251 @@
+"""
+Métricas en memoria (histogramas y contadores) exportadas en el formato de
+texto de Prometheus.
+
+Se comparten entre la API y el bot: la API las publica en GET /metrics y el
+bot levanta un servidor HTTP propio si METRICS_PORT está configurado.
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import FunctionType
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escapar(valor) -> str:
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _etiquetas(nombres, valores, extra=None) -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+def _numero(valor) -> str:
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+class Histograma:
+    """Histograma de duraciones (en segundos) con etiquetas"""
+    
+    tipo = 'histogram'
+    
+    def __init__(self, nombre: str, ayuda: str, etiquetas=(), buckets=BUCKETS):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observar(self, valor: float, *etiquetas):
+        with self._lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                serie = self._series[etiquetas] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][bisect_left(self.buckets, valor)] += 1
+            serie[1] += valor
+            serie[2] += 1
+    
+    @contextmanager
+    def medir(self, *etiquetas):
+        """Observar la duración del bloque; la última etiqueta es el resultado (ok/error)"""
+        inicio = time.perf_counter()
+        resultado = 'ok'
+        try:
+            yield
+        except BaseException:
+            resultado = 'error'
+            raise
+        finally:
+            self.observar(time.perf_counter() - inicio, *etiquetas, resultado)
+    
+    def muestras(self):
+        with self._lock:
+            series = {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+        for valores, (conteos, suma, total) in sorted(series.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float('inf'),), conteos):
+                acumulado += conteo
+                yield '_bucket', _etiquetas(self.etiquetas, valores, f'le="{_numero(limite)}"'), acumulado
+            yield '_sum', _etiquetas(self.etiquetas, valores), suma
+            yield '_count', _etiquetas(self.etiquetas, valores), total
+
+class Contador:
+    tipo = 'counter'
+    
+    def __init__(self, nombre: str, ayuda: str, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+    
+    def incrementar(self, *etiquetas, n: int = 1):
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + n
+    
+    def muestras(self):
+        with self._lock:
+            valores = sorted(self._valores.items())
+        for etiquetas, valor in valores:
+            yield '', _etiquetas(self.etiquetas, etiquetas), valor
+
+class Registro:
+    """Conjunto de métricas del proceso más recolectores que leen estado ajeno al exportar"""
+    
+    def __init__(self):
+        self._metricas = {}
+        self._recolectores = []
+        self._lock = threading.Lock()
+    
+    def _registrar(self, metrica):
+        with self._lock:
+            return self._metricas.setdefault(metrica.nombre, metrica)
+    
+    def histograma(self, nombre: str, ayuda: str, etiquetas=(), buckets=BUCKETS) -> Histograma:
+        return self._registrar(Histograma(nombre, ayuda, etiquetas, buckets))
+    
+    def contador(self, nombre: str, ayuda: str, etiquetas=()) -> Contador:
+        return self._registrar(Contador(nombre, ayuda, etiquetas))
+    
+    def recolector(self, funcion):
+        """
+        Registrar una función que devuelve [(nombre, tipo, ayuda, [(etiquetas, valor)])].
+        Se usa para exponer contadores que ya existen (pool, cachés) sin duplicarlos.
+        """
+        with self._lock:
+            self._recolectores.append(funcion)
+        return funcion
+    
+    def exportar(self) -> str:
+        lineas = []
+        with self._lock:
+            metricas = list(self._metricas.values())
+            recolectores = list(self._recolectores)
+        
+        for metrica in metricas:
+            lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+            lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+            for sufijo, etiquetas, valor in metrica.muestras():
+                lineas.append(f"{metrica.nombre}{sufijo}{etiquetas} {_numero(valor)}")
+        
+        for recolector in recolectores:
+            try:
+                familias = recolector()
+            except Exception as e:
+                print(f"Error recolectando métricas: {e}")
+                continue
+            for nombre, tipo, ayuda, muestras in familias:
+                lineas.append(f"# HELP {nombre} {ayuda}")
+                lineas.append(f"# TYPE {nombre} {tipo}")
+                for etiquetas, valor in muestras:
+                    lineas.append(f"{nombre}{_etiquetas(etiquetas.keys(), etiquetas.values())} {_numero(valor)}")
+        
+        return '\n'.join(lineas) + '\n'
+
+REGISTRO = Registro()
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Métricas compartidas
+
+REPOSITORIOS = REGISTRO.histograma(
+    'auditorios_repositorio_duracion_segundos',
+    'Duración de los métodos de los repositorios',
+    ('repositorio', 'metodo', 'resultado')
+)
+
+BOT_CALLBACKS = REGISTRO.histograma(
+    'auditorios_bot_callback_duracion_segundos',
+    'Duración de button_callback por tipo de callback_data',
+    ('tipo', 'resultado')
+)
+
+BOT_PASOS = REGISTRO.histograma(
+    'auditorios_bot_paso_duracion_segundos',
+    'Duración de handle_message por paso de la conversación',
+    ('paso', 'resultado')
+)
+
+BOT_COMANDOS = REGISTRO.histograma(
+    'auditorios_bot_comando_duracion_segundos',
+    'Duración de los comandos del bot',
+    ('comando', 'resultado')
+)
+
+API_PETICIONES = REGISTRO.histograma(
+    'auditorios_api_peticion_duracion_segundos',
+    'Duración de las peticiones a la API por ruta',
+    ('metodo', 'ruta', 'estado')
+)
+
+POOL_ESPERA = REGISTRO.histograma(
+    'auditorios_db_pool_espera_segundos',
+    'Tiempo de espera para obtener una conexión del pool',
+    ('resultado',)
+)
+
+def instrumentar(nombre: str):
+    """Decorador de clase: mide cada método público del repositorio"""
+    def decorar(cls):
+        for atributo, valor in list(vars(cls).items()):
+            if atributo.startswith('_') or not isinstance(valor, FunctionType):
+                continue
+            setattr(cls, atributo, _medido(valor, nombre))
+        return cls
+    return decorar
+
+def _resultado(valor) -> str:
+    """
+    Etiqueta de resultado según lo que devolvió el método: los repositorios
+    capturan sus errores y responden con un estado, None o False
+    """
+    estado = getattr(valor, 'estado', None)
+    if isinstance(estado, str):
+        return estado
+    if valor is None:
+        return 'nulo'
+    if valor is False:
+        return 'falso'
+    return 'ok'
+
+def _medido(funcion, repositorio: str):
+    metodo = funcion.__name__
+    
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            valor = funcion(*args, **kwargs)
+        except BaseException:
+            REPOSITORIOS.observar(time.perf_counter() - inicio, repositorio, metodo, 'error')
+            raise
+        REPOSITORIOS.observar(time.perf_counter() - inicio, repositorio, metodo, _resultado(valor))
+        return valor
+    return envoltura
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        cuerpo = REGISTRO.exportar().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+    
+    def log_message(self, format, *args):
+        pass
+
+def iniciar_servidor(puerto: int, direccion: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Servir GET /metrics en un hilo aparte (para procesos sin FastAPI, como el bot)"""
+    servidor = ThreadingHTTPServer((direccion, puerto), _Handler)
+    threading.Thread(target=servidor.serve_forever, name="metrics", daemon=True).start()
+    return servidor
@@ -0,0 +1,145 @@
+from mysql.connector import Error, errorcode
+
+# Cada migración es (versión, descripción, sentencias). Las versiones se aplican
+# en orden y una sola vez; para cambiar el esquema se agrega una nueva al final.
+MIGRACIONES = [
+    (1, "Tablas iniciales", [
+        """
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            telegram_id BIGINT UNIQUE NOT NULL,
+            nombre VARCHAR(255) NOT NULL,
+            username VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS auditorios (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            nombre VARCHAR(255) NOT NULL,
+            capacidad INT NOT NULL,
+            ubicacion VARCHAR(255) NOT NULL,
+            descripcion TEXT,
+            activo BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS eventos (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            auditorio_id INT NOT NULL,
+            usuario_telegram_id BIGINT NOT NULL,
+            nombre_evento VARCHAR(255) NOT NULL,
+            fecha DATE NOT NULL,
+            hora_inicio TIME NOT NULL,
+            hora_fin TIME NOT NULL,
+            descripcion TEXT,
+            estado ENUM('reservado', 'cancelado') DEFAULT 'reservado',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (auditorio_id) REFERENCES auditorios(id),
+            FOREIGN KEY (usuario_telegram_id) REFERENCES usuarios(telegram_id)
+        )
+        """
+    ]),
+    (2, "Índices para disponibilidad y listados de eventos", [
+        "CREATE INDEX idx_eventos_auditorio_fecha ON eventos (auditorio_id, fecha, estado, hora_inicio)",
+        "CREATE INDEX idx_eventos_usuario ON eventos (usuario_telegram_id, estado, fecha)"
+    ]),
+    (3, "Series de eventos recurrentes", [
+        """
+        CREATE TABLE IF NOT EXISTS series (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            auditorio_id INT NOT NULL,
+            usuario_telegram_id BIGINT NOT NULL,
+            nombre_evento VARCHAR(255) NOT NULL,
+            frecuencia ENUM('semanal', 'quincenal') NOT NULL,
+            fecha_inicio DATE NOT NULL,
+            fecha_fin DATE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (auditorio_id) REFERENCES auditorios(id),
+            FOREIGN KEY (usuario_telegram_id) REFERENCES usuarios(telegram_id)
+        )
+        """,
+        "ALTER TABLE eventos ADD COLUMN serie_id INT NULL",
+        "CREATE INDEX idx_eventos_serie ON eventos (serie_id, estado, fecha)"
+    ]),
+    (4, "Recordatorios de reservas", [
+        "ALTER TABLE eventos ADD COLUMN recordatorio_enviado BOOLEAN NOT NULL DEFAULT FALSE",
+        "CREATE INDEX idx_eventos_recordatorio ON eventos (estado, recordatorio_enviado, fecha, hora_inicio)"
+    ]),
+    (5, "Histórico de eventos pasados y cancelados", [
+        """
+        CREATE TABLE IF NOT EXISTS eventos_historico (
+            id INT PRIMARY KEY,
+            auditorio_id INT NOT NULL,
+            usuario_telegram_id BIGINT NOT NULL,
+            nombre_evento VARCHAR(255) NOT NULL,
+            fecha DATE NOT NULL,
+            hora_inicio TIME NOT NULL,
+            hora_fin TIME NOT NULL,
+            descripcion TEXT,
+            estado ENUM('reservado', 'cancelado') NOT NULL,
+            created_at TIMESTAMP NULL,
+            serie_id INT NULL,
+            recordatorio_enviado BOOLEAN NOT NULL DEFAULT FALSE,
+            archivado_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_historico_auditorio (auditorio_id, fecha, hora_inicio),
+            INDEX idx_historico_usuario (usuario_telegram_id, fecha, hora_inicio)
+        )
+        """,
+        "CREATE INDEX idx_eventos_fecha ON eventos (fecha)"
+    ]),
+]
+
+# Errores que indican que el cambio ya existe (p. ej. una base creada a mano)
+ERRORES_IGNORABLES = {
+    errorcode.ER_DUP_KEYNAME,
+    errorcode.ER_DUP_FIELDNAME,
+    errorcode.ER_TABLE_EXISTS_ERROR
+}
+
+def version_actual(cursor) -> int:
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+def aplicar_migraciones(connection) -> int:
+    """Aplica las migraciones pendientes y devuelve la versión final del esquema"""
+    cursor = connection.cursor()
+    try:
+        # Evitar que dos procesos migren a la vez
+        cursor.execute("SELECT GET_LOCK('schema_migrations', 60)")
+        cursor.fetchone()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INT PRIMARY KEY,
+                descripcion VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        version = version_actual(cursor)
+        for numero, descripcion, sentencias in MIGRACIONES:
+            if numero <= version:
+                continue
+
+            for sentencia in sentencias:
+                try:
+                    cursor.execute(sentencia)
+                except Error as e:
+                    if e.errno not in ERRORES_IGNORABLES:
+                        raise
+
+            cursor.execute(
+                "INSERT INTO schema_version (version, descripcion) VALUES (%s, %s)",
+                (numero, descripcion)
+            )
+            connection.commit()
+            version = numero
+            print(f"Migración {numero} aplicada: {descripcion}")
+
+        return version
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK('schema_migrations')")
+        cursor.fetchone()
+        cursor.close()
@@ -1,5 +1,5 @@
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, date
+from typing import List, Optional
 from pydantic import BaseModel
 
 class Auditorio(BaseModel):
@@ -22,9 +22,68 @@ class Evento(BaseModel):
     estado: str = "reservado"  # reservado, cancelado
     created_at: Optional[datetime] = None
 
+class EventoDetalle(Evento):
+    """Evento con los datos del auditorio y del usuario obtenidos en la misma consulta"""
+    auditorio_nombre: Optional[str] = None
+    usuario_nombre: Optional[str] = None
+
+class PaginaEventos(BaseModel):
+    eventos: List[EventoDetalle]
+    siguiente: Optional[str] = None  # cursor para la página siguiente
+    anterior: Optional[str] = None   # cursor para la página anterior
+
 class Usuario(BaseModel):
     id: Optional[int] = None
     telegram_id: int
     nombre: str
     username: Optional[str] = None
-    created_at: Optional[datetime] = None
\ No newline at end of file
+    created_at: Optional[datetime] = None
+
+class Conflicto(BaseModel):
+    id: int
+    nombre_evento: str
+    hora_inicio: datetime
+    hora_fin: datetime
+
+class ResultadoReserva(BaseModel):
+    estado: str  # reservado, conflicto, auditorio_no_encontrado, invalido, no_reservado, error
+    evento_id: Optional[int] = None
+    conflictos: List[Conflicto] = []
+    
+    @property
+    def exito(self) -> bool:
+        return self.estado == "reservado"
+
+class ResultadoItemLote(ResultadoReserva):
+    """Resultado de un evento dentro de una reserva en lote"""
+    indice: int  # posición del evento en el lote
+    conflictos_lote: List[int] = []  # posiciones de otros eventos del lote con los que se solapa
+    mensaje: Optional[str] = None
+
+class ResultadoLote(BaseModel):
+    reservados: int
+    rechazados: int
+    resultados: List[ResultadoItemLote]
+
+class Recurrencia(BaseModel):
+    frecuencia: str = "semanal"  # semanal, quincenal
+    hasta: date  # última fecha posible (inclusive)
+    excepciones: List[date] = []  # fechas que se omiten (feriados, exámenes, ...)
+
+class SerieEventos(BaseModel):
+    evento: Evento  # primera ocurrencia: define auditorio, horario y datos del evento
+    recurrencia: Recurrencia
+    omitir_conflictos: bool = False  # reservar las fechas libres aunque otras tengan conflicto
+
+class ResultadoSerie(BaseModel):
+    serie_id: Optional[int] = None
+    reservados: int
+    rechazados: int
+    resultados: List[ResultadoItemLote]
+
+class HorarioLibre(BaseModel):
+    auditorio_id: int
+    auditorio_nombre: str
+    fecha: datetime
+    hora_inicio: datetime
+    hora_fin: datetime
@@ -1,8 +1,38 @@
-from typing import List, Optional
+import os
+from typing import List, Optional, Tuple
 from datetime import datetime, date, timedelta
+from .cache import TTLCache, Versiones
+from .metrics import REGISTRO, instrumentar
 from .connection import DatabaseConnection
-from .models import Auditorio, Evento, Usuario
+from .interval_index import IndiceDisponibilidad, IndiceDia, a_minutos
+from .models import (Auditorio, Evento, EventoDetalle, Usuario, Conflicto, ResultadoReserva, HorarioLibre,
+                     PaginaEventos, ResultadoItemLote, SerieEventos, ResultadoSerie)
+from .horarios import calcular_huecos, expandir_recurrencia
+from .decoding import COLUMNAS_EVENTO, COLUMNAS_AUDITORIO, to_time, fila_a_evento_detalle, fila_a_auditorio
 
+def codificar_cursor(evento: Evento) -> str:
+    """Cursor compacto (cabe en el callback_data de Telegram): AAAAMMDDHHMMSS.id"""
+    return f"{evento.hora_inicio.strftime('%Y%m%d%H%M%S')}.{evento.id}"
+
+def decodificar_cursor(cursor: str):
+    marca, evento_id = cursor.split('.')
+    inicio = datetime.strptime(marca, '%Y%m%d%H%M%S')
+    return inicio.date(), inicio.time(), int(evento_id)
+
+# Filas por sentencia INSERT en las reservas en lote (acota el tamaño del paquete)
+FILAS_POR_INSERT = 500
+# Pares (auditorio, fecha) por consulta al buscar reservas existentes
+PARES_POR_CONSULTA = 200
+
+# Columnas copiadas de eventos a eventos_historico al archivar
+COLUMNAS_HISTORICO = ("id, auditorio_id, usuario_telegram_id, nombre_evento, fecha, hora_inicio, hora_fin, "
+                      "descripcion, estado, created_at, serie_id, recordatorio_enviado")
+
+# Horario de atención usado para calcular ventanas libres
+HORARIO_APERTURA = datetime.strptime(os.getenv('HORARIO_APERTURA', '08:00'), '%H:%M').time()
+HORARIO_CIERRE = datetime.strptime(os.getenv('HORARIO_CIERRE', '22:00'), '%H:%M').time()
+
+@instrumentar('usuarios')
 class UsuarioRepository:
     def __init__(self):
         self.db = DatabaseConnection()
@@ -46,38 +76,78 @@ class UsuarioRepository:
                 connection.close()
         return None
 
+@instrumentar('auditorios')
 class AuditorioRepository:
+    # Caché del catálogo compartida por el bot y la API dentro del proceso
+    cache = TTLCache(
+        ttl=float(os.getenv('CATALOGO_CACHE_TTL', '300')),
+        max_entries=int(os.getenv('CATALOGO_CACHE_MAX', '1024'))
+    )
+    
     def __init__(self):
         self.db = DatabaseConnection()
     
+    @property
+    def version_catalogo(self) -> int:
+        """Aumenta cada vez que el catálogo se recarga o invalida (para memorizar vistas)"""
+        return self.cache.version
+    
+    @classmethod
+    def invalidar_cache(cls, auditorio_id: int = None):
+        """Invalidar el catálogo tras modificar la tabla auditorios"""
+        if auditorio_id is None:
+            cls.cache.invalidate()
+        else:
+            cls.cache.invalidate(('auditorio', auditorio_id))
+            cls.cache.invalidate('auditorios')
+    
     def obtener_auditorios(self) -> List[Auditorio]:
+        return self._cargar_catalogo()[0]
+    
+    def obtener_auditorios_versionado(self) -> Tuple[List[Auditorio], int]:
+        """Catálogo junto con la versión de la caché que le corresponde (para memorizar vistas)"""
+        return self._cargar_catalogo()
+    
+    def _cargar_catalogo(self) -> Tuple[List[Auditorio], int]:
+        # La versión se lee con el mismo lock que el catálogo: leerla después podría
+        # asociar una lista vieja con la versión de una recarga concurrente
+        auditorios, version = self.cache.get_con_version('auditorios')
+        if auditorios is not None:
+            return list(auditorios), version
+        
         connection = self.db.get_connection()
         auditorios = []
         if connection:
-            cursor = connection.cursor(dictionary=True)
+            cursor = connection.cursor()
             try:
-                cursor.execute("SELECT * FROM auditorios WHERE activo = TRUE")
-                results = cursor.fetchall()
-                auditorios = [Auditorio(**row) for row in results]
+                cursor.execute(f"SELECT {COLUMNAS_AUDITORIO} FROM auditorios WHERE activo = TRUE")
+                auditorios = [fila_a_auditorio(row) for row in cursor.fetchall()]
+                version = self.cache.set('auditorios', auditorios, nueva_version=True)
             except Exception as e:
                 print(f"Error obteniendo auditorios: {e}")
             finally:
                 cursor.close()
                 connection.close()
-        return auditorios
+        return list(auditorios), version
     
     def obtener_auditorio(self, auditorio_id: int) -> Optional[Auditorio]:
+        auditorio = self.cache.get(('auditorio', auditorio_id))
+        if auditorio is not None:
+            return auditorio
+        
         connection = self.db.get_connection()
         if connection:
-            cursor = connection.cursor(dictionary=True)
+            cursor = connection.cursor()
             try:
                 cursor.execute(
-                    "SELECT * FROM auditorios WHERE id = %s AND activo = TRUE",
+                    f"SELECT {COLUMNAS_AUDITORIO} FROM auditorios WHERE id = %s AND activo = TRUE",
                     (auditorio_id,)
                 )
                 result = cursor.fetchone()
                 if result:
-                    return Auditorio(**result)
+                    auditorio = fila_a_auditorio(result)
+                    self.cache.set(('auditorio', auditorio_id), auditorio)
+                    return auditorio
             except Exception as e:
                 print(f"Error obteniendo auditorio: {e}")
             finally:
@@ -85,39 +155,341 @@ class AuditorioRepository:
                 connection.close()
         return None
 
+@instrumentar('eventos')
 class EventoRepository:
+    # Índice opcional de intervalos reservados; la base sigue siendo la fuente de verdad
+    indice = IndiceDisponibilidad(
+        ttl=float(os.getenv('INDICE_DISPONIBILIDAD_TTL', '60')),
+        max_dias=int(os.getenv('INDICE_DISPONIBILIDAD_MAX_DIAS', '4096'))
+    ) if os.getenv('INDICE_DISPONIBILIDAD', 'false').lower() in ('1', 'true', 'yes') else None
+    
+    # Versión de los eventos de cada auditorio: aumenta al crear o cancelar una reserva
+    versiones = Versiones()
+    
+    # Funciones avisadas tras reservar o cancelar: funcion(accion, datos), con
+    # accion 'reservado' y datos [(evento_id, evento)] o 'cancelado' y datos [evento_id]
+    observadores = []
+    
     def __init__(self):
         self.db = DatabaseConnection()
     
-    def crear_evento(self, evento: Evento) -> bool:
-        connection = self.db.get_connection()
-        if connection:
-            cursor = connection.cursor()
+    @classmethod
+    def observar(cls, funcion):
+        cls.observadores.append(funcion)
+        return funcion
+    
+    def _notificar(self, accion: str, datos):
+        for funcion in self.observadores:
             try:
+                funcion(accion, datos)
+            except Exception as e:
+                print(f"Error notificando {accion}: {e}")
+    
+    def reservar(self, evento: Evento) -> ResultadoReserva:
+        """Verificar conflictos e insertar la reserva en una sola transacción"""
+        if evento.hora_fin.time() <= evento.hora_inicio.time():
+            return ResultadoReserva(estado="invalido")
+        
+        connection = self.db.get_connection()
+        if not connection:
+            return ResultadoReserva(estado="error")
+        
+        fecha = evento.fecha.date()
+        hora_inicio = evento.hora_inicio.time()
+        hora_fin = evento.hora_fin.time()
+        cursor = connection.cursor()
+        try:
+            connection.start_transaction()
+            
+            # Bloquear el auditorio serializa las reservas concurrentes sobre la misma sala
+            cursor.execute(
+                "SELECT id FROM auditorios WHERE id = %s AND activo = TRUE FOR UPDATE",
+                (evento.auditorio_id,)
+            )
+            if not cursor.fetchall():
+                connection.rollback()
+                return ResultadoReserva(estado="auditorio_no_encontrado")
+            
+            cursor.execute("""
+                INSERT INTO eventos
+                (auditorio_id, usuario_telegram_id, nombre_evento, fecha, hora_inicio, hora_fin, descripcion)
+                SELECT %s, %s, %s, %s, %s, %s, %s FROM DUAL
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM eventos
+                    WHERE auditorio_id = %s AND fecha = %s AND estado = 'reservado'
+                    AND hora_inicio < %s AND hora_fin > %s
+                )
+            """, (
+                evento.auditorio_id,
+                evento.usuario_telegram_id,
+                evento.nombre_evento,
+                fecha,
+                hora_inicio,
+                hora_fin,
+                evento.descripcion,
+                evento.auditorio_id, fecha, hora_fin, hora_inicio
+            ))
+            
+            if cursor.rowcount == 0:
                 cursor.execute("""
-                    INSERT INTO eventos 
-                    (auditorio_id, usuario_telegram_id, nombre_evento, fecha, hora_inicio, hora_fin, descripcion)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    SELECT id, nombre_evento, hora_inicio, hora_fin FROM eventos
+                    WHERE auditorio_id = %s AND fecha = %s AND estado = 'reservado'
+                    AND hora_inicio < %s AND hora_fin > %s
+                    ORDER BY hora_inicio
+                """, (evento.auditorio_id, fecha, hora_fin, hora_inicio))
+                conflictos = [
+                    Conflicto(
+                        id=row[0],
+                        nombre_evento=row[1],
+                        hora_inicio=datetime.combine(fecha, to_time(row[2])),
+                        hora_fin=datetime.combine(fecha, to_time(row[3]))
+                    )
+                    for row in cursor.fetchall()
+                ]
+                connection.rollback()
+                return ResultadoReserva(estado="conflicto", conflictos=conflictos)
+            
+            evento_id = cursor.lastrowid
+            connection.commit()
+            self.versiones.incrementar(evento.auditorio_id)
+            if self.indice is not None:
+                self.indice.agregar(evento_id, evento.auditorio_id, fecha, hora_inicio, hora_fin)
+            if self.observadores:
+                self._notificar('reservado', [(evento_id, evento)])
+            return ResultadoReserva(estado="reservado", evento_id=evento_id)
+        except Exception as e:
+            connection.rollback()
+            print(f"Error reservando evento: {e}")
+            return ResultadoReserva(estado="error")
+        finally:
+            cursor.close()
+            connection.close()
+    
+    def _reservados_en(self, cursor, claves):
+        """Reservas activas en los pares (auditorio, fecha): (id, auditorio_id, fecha, nombre, inicio, fin)"""
+        filas = []
+        for desde in range(0, len(claves), PARES_POR_CONSULTA):
+            bloque = claves[desde:desde + PARES_POR_CONSULTA]
+            cursor.execute(f"""
+                SELECT id, auditorio_id, fecha, nombre_evento, hora_inicio, hora_fin FROM eventos
+                WHERE estado = 'reservado'
+                AND ({' OR '.join(['(auditorio_id = %s AND fecha = %s)'] * len(bloque))})
+            """, [valor for clave in bloque for valor in clave])
+            filas.extend(cursor.fetchall())
+        return filas
+    
+    def reservar_lote(self, eventos: List[Evento]) -> List[ResultadoItemLote]:
+        """
+        Reservar muchos eventos en una transacción.
+        
+        Los conflictos con reservas existentes y entre eventos del mismo lote se
+        detectan en memoria a partir de una sola consulta; ante un solape gana el
+        evento que aparece antes en el lote. Los aceptados se insertan con
+        INSERT de varias filas y, si algo falla, no se reserva ninguno.
+        """
+        resultados, _ = self._reservar_varios(eventos)
+        return resultados
+    
+    def reservar_serie(self, serie: SerieEventos) -> ResultadoSerie:
+        """
+        Expandir una serie recurrente y reservar todas sus fechas en una transacción.
+        Si alguna fecha tiene conflicto no se reserva ninguna, salvo que
+        `omitir_conflictos` pida reservar solo las libres. Lanza ValueError si la
+        recurrencia no es válida o no deja ninguna fecha.
+        """
+        evento = serie.evento
+        recurrencia = serie.recurrencia
+        fechas = expandir_recurrencia(evento.fecha.date(), recurrencia.frecuencia,
+                                      recurrencia.hasta, recurrencia.excepciones)
+        if not fechas:
+            # Todas las fechas quedaron excluidas por las excepciones
+            raise ValueError("La serie no tiene fechas")
+        ocurrencias = [
+            evento.model_copy(update={
+                'fecha': datetime.combine(fecha, datetime.min.time()),
+                'hora_inicio': datetime.combine(fecha, evento.hora_inicio.time()),
+                'hora_fin': datetime.combine(fecha, evento.hora_fin.time())
+            })
+            for fecha in fechas
+        ]
+        resultados, serie_id = self._reservar_varios(ocurrencias, serie)
+        reservados = sum(1 for r in resultados if r.exito)
+        return ResultadoSerie(serie_id=serie_id, reservados=reservados,
+                              rechazados=len(resultados) - reservados, resultados=resultados)
+    
+    def _reservar_varios(self, eventos: List[Evento], serie: SerieEventos = None):
+        """Núcleo de reservar_lote y reservar_serie: devuelve (resultados, serie_id)"""
+        resultados = [ResultadoItemLote(indice=i, estado="reservado") for i in range(len(eventos))]
+        pendientes = []
+        for i, evento in enumerate(eventos):
+            if evento.hora_fin.time() <= evento.hora_inicio.time():
+                resultados[i].estado = "invalido"
+                resultados[i].mensaje = "La hora de fin debe ser posterior a la de inicio"
+            else:
+                pendientes.append(i)
+        if not pendientes:
+            return resultados, None
+        
+        connection = self.db.get_connection()
+        if not connection:
+            for i in pendientes:
+                resultados[i].estado = "error"
+            return resultados, None
+        
+        cursor = connection.cursor()
+        try:
+            connection.start_transaction()
+            
+            # Bloquear los auditorios en orden fijo para no provocar interbloqueos
+            auditorios = sorted({eventos[i].auditorio_id for i in pendientes})
+            cursor.execute(f"""
+                SELECT id FROM auditorios
+                WHERE id IN ({', '.join(['%s'] * len(auditorios))}) AND activo = TRUE
+                ORDER BY id FOR UPDATE
+            """, auditorios)
+            activos = {fila[0] for fila in cursor.fetchall()}
+            
+            claves = sorted({(eventos[i].auditorio_id, eventos[i].fecha.date())
+                             for i in pendientes if eventos[i].auditorio_id in activos})
+            # Las reservas existentes pueden solaparse entre sí, así que se revisan
+            # todas las del día con el mismo predicado que usa reservar
+            existentes = {}
+            for evento_id, auditorio_id, fecha, nombre, inicio, fin in self._reservados_en(cursor, claves):
+                existentes.setdefault((auditorio_id, fecha), []).append(
+                    (a_minutos(inicio), a_minutos(fin), evento_id, nombre, inicio, fin)
+                )
+            for filas in existentes.values():
+                filas.sort()
+            lote = {}
+            
+            aceptados = []
+            for i in pendientes:
+                evento = eventos[i]
+                resultado = resultados[i]
+                if evento.auditorio_id not in activos:
+                    resultado.estado = "auditorio_no_encontrado"
+                    continue
+                
+                clave = (evento.auditorio_id, evento.fecha.date())
+                inicio, fin = a_minutos(evento.hora_inicio.time()), a_minutos(evento.hora_fin.time())
+                conflictos = [
+                    Conflicto(
+                        id=evento_id,
+                        nombre_evento=nombre,
+                        hora_inicio=datetime.combine(clave[1], to_time(hora_inicio)),
+                        hora_fin=datetime.combine(clave[1], to_time(hora_fin))
+                    )
+                    for inicio_existente, fin_existente, evento_id, nombre, hora_inicio, hora_fin
+                    in existentes.get(clave, ())
+                    if inicio_existente < fin and fin_existente > inicio
+                ]
+                # Los eventos del lote ya aceptados no se solapan entre sí
+                dia = lote.get(clave)
+                if dia is None:
+                    dia = lote[clave] = IndiceDia([])
+                conflictos_lote = dia.conflictos(inicio, fin)
+                if conflictos or conflictos_lote:
+                    resultado.estado = "conflicto"
+                    resultado.conflictos = conflictos
+                    resultado.conflictos_lote = conflictos_lote
+                    continue
+                
+                dia.agregar(inicio, fin, i)
+                aceptados.append(i)
+            
+            serie_id = None
+            if serie is not None and aceptados:
+                if len(aceptados) < len(eventos) and not serie.omitir_conflictos:
+                    connection.rollback()
+                    for i in aceptados:
+                        resultados[i].estado = "no_reservado"
+                        resultados[i].mensaje = "Otras fechas de la serie tienen conflictos"
+                    return resultados, None
+                
+                cursor.execute("""
+                    INSERT INTO series
+                    (auditorio_id, usuario_telegram_id, nombre_evento, frecuencia, fecha_inicio, fecha_fin)
+                    VALUES (%s, %s, %s, %s, %s, %s)
                 """, (
-                    evento.auditorio_id,
-                    evento.usuario_telegram_id,
-                    evento.nombre_evento,
-                    evento.fecha.date(),
-                    evento.hora_inicio.time(),
-                    evento.hora_fin.time(),
-                    evento.descripcion
+                    serie.evento.auditorio_id,
+                    serie.evento.usuario_telegram_id,
+                    serie.evento.nombre_evento,
+                    serie.recurrencia.frecuencia,
+                    eventos[aceptados[0]].fecha.date(),
+                    eventos[aceptados[-1]].fecha.date()
                 ))
-                connection.commit()
-                return True
-            except Exception as e:
-                print(f"Error creando evento: {e}")
-                return False
-            finally:
-                cursor.close()
-                connection.close()
-        return False
+                serie_id = cursor.lastrowid
+            
+            if aceptados:
+                cursor.execute("SELECT COALESCE(MAX(id), 0) FROM eventos")
+                ultimo_id = cursor.fetchone()[0]
+                for desde in range(0, len(aceptados), FILAS_POR_INSERT):
+                    bloque = aceptados[desde:desde + FILAS_POR_INSERT]
+                    valores = []
+                    for i in bloque:
+                        evento = eventos[i]
+                        valores.extend((
+                            evento.auditorio_id,
+                            evento.usuario_telegram_id,
+                            evento.nombre_evento,
+                            evento.fecha.date(),
+                            evento.hora_inicio.time(),
+                            evento.hora_fin.time(),
+                            evento.descripcion,
+                            serie_id
+                        ))
+                    cursor.execute(f"""
+                        INSERT INTO eventos
+                        (auditorio_id, usuario_telegram_id, nombre_evento, fecha, hora_inicio, hora_fin, descripcion, serie_id)
+                        VALUES {', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s)'] * len(bloque))}
+                    """, valores)
+                
+                # Recuperar los ids: todas las inserciones en eventos bloquean antes su
+                # auditorio, así que las filas nuevas de estos auditorios son las del lote
+                # y, sin solapes, (auditorio, fecha, hora de inicio) identifica cada una
+                cursor.execute(f"""
+                    SELECT id, auditorio_id, fecha, hora_inicio FROM eventos
+                    WHERE id > %s AND auditorio_id IN ({', '.join(['%s'] * len(auditorios))})
+                """, (ultimo_id, *auditorios))
+                nuevos = {
+                    (auditorio_id, fecha, a_minutos(inicio)): evento_id
+                    for evento_id, auditorio_id, fecha, inicio in cursor.fetchall()
+                }
+                for i in aceptados:
+                    evento = eventos[i]
+                    resultados[i].evento_id = nuevos.get(
+                        (evento.auditorio_id, evento.fecha.date(), a_minutos(evento.hora_inicio.time()))
+                    )
+            
+            connection.commit()
+            for i in aceptados:
+                evento = eventos[i]
+                self.versiones.incrementar(evento.auditorio_id)
+                if self.indice is not None:
+                    self.indice.agregar(
+                        resultados[i].evento_id,
+                        evento.auditorio_id,
+                        evento.fecha.date(),
+                        evento.hora_inicio.time(),
+                        evento.hora_fin.time()
+                    )
+            if self.observadores and aceptados:
+                self._notificar('reservado', [(resultados[i].evento_id, eventos[i]) for i in aceptados])
+            return resultados, serie_id
+        except Exception as e:
+            connection.rollback()
+            print(f"Error reservando lote de eventos: {e}")
+            for i in pendientes:
+                resultados[i] = ResultadoItemLote(indice=i, estado="error")
+            return resultados, None
+        finally:
+            cursor.close()
+            connection.close()
     
     def verificar_disponibilidad(self, auditorio_id: int, fecha: date, hora_inicio: datetime, hora_fin: datetime) -> bool:
+        if self.indice is not None:
+            return self._verificar_con_indice(auditorio_id, fecha, hora_inicio, hora_fin)
+        
         connection = self.db.get_connection()
         if connection:
             cursor = connection.cursor()
@@ -148,15 +520,300 @@ class EventoRepository:
                 connection.close()
         return False
     
-    def obtener_eventos_auditorio(self, auditorio_id: int, fecha: date = None) -> List[Evento]:
+    def _verificar_con_indice(self, auditorio_id: int, fecha: date, hora_inicio: datetime, hora_fin: datetime) -> bool:
+        conflicto = self.indice.hay_conflicto(auditorio_id, fecha, hora_inicio.time(), hora_fin.time())
+        if conflicto is not None:
+            return not conflicto
+        
+        # Día no cargado: traer todas sus reservas en una consulta y responder desde el índice
+        connection = self.db.get_connection()
+        if connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("""
+                    SELECT id, hora_inicio, hora_fin FROM eventos
+                    WHERE auditorio_id = %s AND fecha = %s AND estado = 'reservado'
+                """, (auditorio_id, fecha))
+                return not self.indice.cargar_y_consultar(
+                    auditorio_id, fecha, cursor.fetchall(), hora_inicio.time(), hora_fin.time()
+                )
+            except Exception as e:
+                print(f"Error verificando disponibilidad: {e}")
+                return False
+            finally:
+                cursor.close()
+                connection.close()
+        return False
+    
+    def obtener_horarios_libres(self, desde: date, hasta: date, duracion_minima: int = 0) -> List[HorarioLibre]:
+        """Ventanas libres de todos los auditorios activos entre dos fechas (duración en minutos)"""
+        auditorios = AuditorioRepository().obtener_auditorios()
+        if not auditorios:
+            return []
+        
+        connection = self.db.get_connection()
+        horarios = []
+        if connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("""
+                    SELECT e.auditorio_id, e.fecha, e.hora_inicio, e.hora_fin
+                    FROM eventos e
+                    JOIN auditorios a ON e.auditorio_id = a.id
+                    WHERE a.activo = TRUE AND e.fecha BETWEEN %s AND %s AND e.estado = 'reservado'
+                    ORDER BY e.auditorio_id, e.fecha, e.hora_inicio
+                """, (desde, hasta))
+                
+                ocupados = {}
+                for auditorio_id, fecha, hora_inicio, hora_fin in cursor.fetchall():
+                    ocupados.setdefault((auditorio_id, fecha), []).append((to_time(hora_inicio), to_time(hora_fin)))
+                
+                nombres = {a.id: a.nombre for a in auditorios}
+                huecos = calcular_huecos(
+                    list(nombres),
+                    ocupados,
+                    desde,
+                    hasta,
+                    HORARIO_APERTURA,
+                    HORARIO_CIERRE,
+                    timedelta(minutes=duracion_minima),
+                    ahora=datetime.now()
+                )
+                horarios = [
+                    HorarioLibre(
+                        auditorio_id=auditorio_id,
+                        auditorio_nombre=nombres[auditorio_id],
+                        fecha=datetime.combine(fecha, datetime.min.time()),
+                        hora_inicio=datetime.combine(fecha, inicio),
+                        hora_fin=datetime.combine(fecha, fin)
+                    )
+                    for auditorio_id, fecha, inicio, fin in huecos
+                ]
+            except Exception as e:
+                print(f"Error obteniendo horarios libres: {e}")
+            finally:
+                cursor.close()
+                connection.close()
+        return horarios
+    
+    def listar_eventos_auditorio(self, auditorio_id: int, **kwargs) -> PaginaEventos:
+        return self._listar_eventos("e.auditorio_id = %s", (auditorio_id,), **kwargs)
+    
+    def listar_eventos_usuario(self, telegram_id: int, **kwargs) -> PaginaEventos:
+        return self._listar_eventos("e.usuario_telegram_id = %s", (telegram_id,), **kwargs)
+    
+    def _listar_eventos(
+        self,
+        filtro: str,
+        params: tuple,
+        fecha: date = None,
+        limite: int = 20,
+        cursor: str = None,
+        direccion: str = "siguiente",
+        incluir_pasados: bool = False
+    ) -> PaginaEventos:
+        """Página de eventos reservados ordenada por (fecha, hora_inicio, id) usando keyset"""
+        condiciones = [filtro, "e.estado = 'reservado'"]
+        valores = list(params)
+        
+        if fecha:
+            condiciones.append("e.fecha = %s")
+            valores.append(fecha)
+        if not incluir_pasados:
+            ahora = datetime.now()
+            condiciones.append("(e.fecha > %s OR (e.fecha = %s AND e.hora_fin > %s))")
+            valores += [ahora.date(), ahora.date(), ahora.time()]
+        
+        atras = direccion == "anterior"
+        if cursor:
+            c_fecha, c_hora, c_id = decodificar_cursor(cursor)
+            op = "<" if atras else ">"
+            condiciones.append(
+                f"(e.fecha {op} %s OR (e.fecha = %s AND (e.hora_inicio {op} %s OR (e.hora_inicio = %s AND e.id {op} %s))))"
+            )
+            valores += [c_fecha, c_fecha, c_hora, c_hora, c_id]
+        
+        orden = "DESC" if atras else "ASC"
+        valores.append(limite + 1)
+        
         connection = self.db.get_connection()
         eventos = []
+        hay_mas = False
         if connection:
-            cursor = connection.cursor(dictionary=True)
+            db_cursor = connection.cursor()
+            try:
+                db_cursor.execute(f"""
+                    SELECT {COLUMNAS_EVENTO}
+                    FROM eventos e
+                    JOIN auditorios a ON e.auditorio_id = a.id
+                    LEFT JOIN usuarios u ON e.usuario_telegram_id = u.telegram_id
+                    WHERE {' AND '.join(condiciones)}
+                    ORDER BY e.fecha {orden}, e.hora_inicio {orden}, e.id {orden}
+                    LIMIT %s
+                """, tuple(valores))
+                filas = db_cursor.fetchall()
+                hay_mas = len(filas) > limite
+                filas = filas[:limite]
+                if atras:
+                    filas.reverse()
+                eventos = [fila_a_evento_detalle(fila) for fila in filas]
+            except Exception as e:
+                print(f"Error listando eventos: {e}")
+            finally:
+                db_cursor.close()
+                connection.close()
+        
+        if not eventos:
+            return PaginaEventos(eventos=[])
+        primero, ultimo = codificar_cursor(eventos[0]), codificar_cursor(eventos[-1])
+        if atras:
+            return PaginaEventos(eventos=eventos, anterior=primero if hay_mas else None, siguiente=ultimo)
+        return PaginaEventos(eventos=eventos, anterior=primero if cursor else None, siguiente=ultimo if hay_mas else None)
+    
+    def listar_historial_auditorio(self, auditorio_id: int, **kwargs) -> PaginaEventos:
+        return self._listar_historial("e.auditorio_id = %s", (auditorio_id,), **kwargs)
+    
+    def listar_historial_usuario(self, telegram_id: int, **kwargs) -> PaginaEventos:
+        return self._listar_historial("e.usuario_telegram_id = %s", (telegram_id,), **kwargs)
+    
+    def _listar_historial(
+        self,
+        filtro: str,
+        params: tuple,
+        limite: int = 20,
+        cursor: str = None,
+        direccion: str = "siguiente"
+    ) -> PaginaEventos:
+        """
+        Página de eventos archivados (pasados y cancelados), del más reciente al más
+        antiguo: "siguiente" avanza hacia eventos anteriores. Solo lee eventos_historico.
+        """
+        condiciones = [filtro]
+        valores = list(params)
+        
+        atras = direccion == "anterior"
+        if cursor:
+            c_fecha, c_hora, c_id = decodificar_cursor(cursor)
+            op = ">" if atras else "<"
+            condiciones.append(
+                f"(e.fecha {op} %s OR (e.fecha = %s AND (e.hora_inicio {op} %s OR (e.hora_inicio = %s AND e.id {op} %s))))"
+            )
+            valores += [c_fecha, c_fecha, c_hora, c_hora, c_id]
+        
+        orden = "ASC" if atras else "DESC"
+        valores.append(limite + 1)
+        
+        connection = self.db.get_connection()
+        eventos = []
+        hay_mas = False
+        if connection:
+            db_cursor = connection.cursor()
+            try:
+                db_cursor.execute(f"""
+                    SELECT {COLUMNAS_EVENTO}
+                    FROM eventos_historico e
+                    JOIN auditorios a ON e.auditorio_id = a.id
+                    LEFT JOIN usuarios u ON e.usuario_telegram_id = u.telegram_id
+                    WHERE {' AND '.join(condiciones)}
+                    ORDER BY e.fecha {orden}, e.hora_inicio {orden}, e.id {orden}
+                    LIMIT %s
+                """, tuple(valores))
+                filas = db_cursor.fetchall()
+                hay_mas = len(filas) > limite
+                filas = filas[:limite]
+                if atras:
+                    filas.reverse()
+                eventos = [fila_a_evento_detalle(fila) for fila in filas]
+            except Exception as e:
+                print(f"Error listando historial: {e}")
+            finally:
+                db_cursor.close()
+                connection.close()
+        
+        if not eventos:
+            return PaginaEventos(eventos=[])
+        primero, ultimo = codificar_cursor(eventos[0]), codificar_cursor(eventos[-1])
+        if atras:
+            return PaginaEventos(eventos=eventos, anterior=primero if hay_mas else None, siguiente=ultimo)
+        return PaginaEventos(eventos=eventos, anterior=primero if cursor else None, siguiente=ultimo if hay_mas else None)
+    
+    def archivar_lote(self, antes_de: date, limite: int = 1000) -> int:
+        """
+        Mover a eventos_historico hasta `limite` eventos cancelados o con fecha anterior
+        a `antes_de`. La transacción solo toca esas filas por clave primaria, así que
+        los bloqueos duran lo que un lote. Devuelve cuántos eventos se movieron.
+        """
+        connection = self.db.get_connection()
+        if not connection:
+            return 0
+        cursor = connection.cursor()
+        try:
+            # Candidatos por índice: (estado, ...) para los cancelados y (fecha) para los pasados
+            cursor.execute(
+                "SELECT id, auditorio_id, fecha, estado FROM eventos WHERE estado = 'cancelado' LIMIT %s",
+                (limite,)
+            )
+            candidatos = {fila[0]: fila for fila in cursor.fetchall()}
+            if len(candidatos) < limite:
+                cursor.execute(
+                    "SELECT id, auditorio_id, fecha, estado FROM eventos WHERE fecha < %s LIMIT %s",
+                    (antes_de, limite)
+                )
+                for fila in cursor.fetchall():
+                    if len(candidatos) >= limite:
+                        break
+                    candidatos.setdefault(fila[0], fila)
+            if not candidatos:
+                return 0
+            
+            marcadores = ', '.join(['%s'] * len(candidatos))
+            connection.start_transaction()
+            # Bloquear los candidatos que siguen cumpliendo la condición: pudieron
+            # cambiar desde la selección, y solo esos se mueven
+            cursor.execute(f"""
+                SELECT id, auditorio_id, fecha, estado FROM eventos
+                WHERE id IN ({marcadores}) AND (estado = 'cancelado' OR fecha < %s)
+                FOR UPDATE
+            """, (*candidatos, antes_de))
+            filas = cursor.fetchall()
+            if not filas:
+                connection.rollback()
+                return 0
+            
+            ids = [fila[0] for fila in filas]
+            marcadores = ', '.join(['%s'] * len(ids))
+            cursor.execute(f"""
+                INSERT INTO eventos_historico ({COLUMNAS_HISTORICO})
+                SELECT {COLUMNAS_HISTORICO} FROM eventos WHERE id IN ({marcadores})
+            """, ids)
+            cursor.execute(f"DELETE FROM eventos WHERE id IN ({marcadores})", ids)
+            movidos = cursor.rowcount
+            connection.commit()
+            
+            for auditorio_id in {fila[1] for fila in filas}:
+                self.versiones.incrementar(auditorio_id)
+            if self.indice is not None:
+                for evento_id, auditorio_id, fecha, estado in filas:
+                    if estado == 'reservado':
+                        self.indice.quitar(evento_id, auditorio_id, fecha)
+            return movidos
+        except Exception as e:
+            connection.rollback()
+            print(f"Error archivando eventos: {e}")
+            return 0
+        finally:
+            cursor.close()
+            connection.close()
+    
+    def obtener_eventos_auditorio(self, auditorio_id: int, fecha: date = None) -> List[EventoDetalle]:
+        connection = self.db.get_connection()
+        eventos = []
+        if connection:
+            cursor = connection.cursor()
             try:
                 if fecha:
-                    cursor.execute("""
-                        SELECT e.*, a.nombre as auditorio_nombre, u.nombre as usuario_nombre
+                    cursor.execute(f"""
+                        SELECT {COLUMNAS_EVENTO}
                         FROM eventos e
                         JOIN auditorios a ON e.auditorio_id = a.id
                         JOIN usuarios u ON e.usuario_telegram_id = u.telegram_id
@@ -164,8 +821,8 @@ class EventoRepository:
                         ORDER BY e.fecha, e.hora_inicio
                     """, (auditorio_id, fecha))
                 else:
-                    cursor.execute("""
-                        SELECT e.*, a.nombre as auditorio_nombre, u.nombre as usuario_nombre
+                    cursor.execute(f"""
+                        SELECT {COLUMNAS_EVENTO}
                         FROM eventos e
                         JOIN auditorios a ON e.auditorio_id = a.id
                         JOIN usuarios u ON e.usuario_telegram_id = u.telegram_id
@@ -173,34 +830,8 @@ class EventoRepository:
                         ORDER BY e.fecha, e.hora_inicio
                     """, (auditorio_id,))
                 
-                results = cursor.fetchall()
-                for row in results:
-                    fecha = row['fecha']
-                    hora_inicio = row['hora_inicio']
-                    hora_fin = row['hora_fin']
-                    # Convertir a time si es necesario
-                    def to_time(val):
-                        if isinstance(val, timedelta):
-                            return (datetime.min + val).time()
-                        elif isinstance(val, datetime):
-                            return val.time()
-                        return val
-                    hora_inicio = to_time(hora_inicio)
-                    hora_fin = to_time(hora_fin)
-                    evento_data = {
-                        'id': row['id'],
-                        'auditorio_id': row['auditorio_id'],
-                        'usuario_telegram_id': row['usuario_telegram_id'],
-                        'nombre_evento': row['nombre_evento'],
-                        'fecha': datetime.combine(fecha, datetime.min.time()),
-                        'hora_inicio': datetime.combine(fecha, hora_inicio),
-                        'hora_fin': datetime.combine(fecha, hora_fin),
-                        'descripcion': row['descripcion'],
-                        'estado': row['estado'],
-                        'created_at': row['created_at']
-                    }
-                    eventos.append(Evento(**evento_data))
-                    
+                eventos = [fila_a_evento_detalle(row) for row in cursor.fetchall()]
+            
             except Exception as e:
                 print(f"Error obteniendo eventos: {e}")
             finally:
@@ -208,48 +839,23 @@ class EventoRepository:
                 connection.close()
         return eventos
     
-    def obtener_eventos_usuario(self, telegram_id: int) -> List[Evento]:
+    def obtener_eventos_usuario(self, telegram_id: int) -> List[EventoDetalle]:
         connection = self.db.get_connection()
         eventos = []
         if connection:
-            cursor = connection.cursor(dictionary=True)
+            cursor = connection.cursor()
             try:
-                cursor.execute("""
-                    SELECT e.*, a.nombre as auditorio_nombre
+                cursor.execute(f"""
+                    SELECT {COLUMNAS_EVENTO}
                     FROM eventos e
                     JOIN auditorios a ON e.auditorio_id = a.id
+                    LEFT JOIN usuarios u ON e.usuario_telegram_id = u.telegram_id
                     WHERE e.usuario_telegram_id = %s AND e.estado = 'reservado'
                     ORDER BY e.fecha, e.hora_inicio
                 """, (telegram_id,))
                 
-                results = cursor.fetchall()
-                for row in results:
-                    fecha = row['fecha']
-                    hora_inicio = row['hora_inicio']
-                    hora_fin = row['hora_fin']
-                    # Convertir a time si es necesario
-                    def to_time(val):
-                        if isinstance(val, timedelta):
-                            return (datetime.min + val).time()
-                        elif isinstance(val, datetime):
-                            return val.time()
-                        return val
-                    hora_inicio = to_time(hora_inicio)
-                    hora_fin = to_time(hora_fin)
-                    evento_data = {
-                        'id': row['id'],
-                        'auditorio_id': row['auditorio_id'],
-                        'usuario_telegram_id': row['usuario_telegram_id'],
-                        'nombre_evento': row['nombre_evento'],
-                        'fecha': datetime.combine(fecha, datetime.min.time()) if fecha else None,
-                        'hora_inicio': datetime.combine(fecha, hora_inicio) if fecha and hora_inicio else None,
-                        'hora_fin': datetime.combine(fecha, hora_fin) if fecha and hora_fin else None,
-                        'descripcion': row['descripcion'],
-                        'estado': row['estado'],
-                        'created_at': row['created_at']
-                    }
-                    eventos.append(Evento(**evento_data))
-                
+                eventos = [fila_a_evento_detalle(row) for row in cursor.fetchall()]
+            
             except Exception as e:
                 print(f"Error obteniendo eventos de usuario: {e}")
             finally:
@@ -262,17 +868,159 @@ class EventoRepository:
         if connection:
             cursor = connection.cursor()
             try:
+                cursor.execute("SELECT auditorio_id, fecha FROM eventos WHERE id = %s", (evento_id,))
+                filas = cursor.fetchall()
+                ubicacion = filas[0] if filas else None
+                
                 cursor.execute("""
                     UPDATE eventos 
                     SET estado = 'cancelado' 
                     WHERE id = %s AND usuario_telegram_id = %s AND estado = 'reservado'
                 """, (evento_id, telegram_id))
                 connection.commit()
-                return cursor.rowcount > 0
+                cancelado = cursor.rowcount > 0
+                if cancelado and ubicacion:
+                    self.versiones.incrementar(ubicacion[0])
+                    if self.indice is not None:
+                        self.indice.quitar(evento_id, ubicacion[0], ubicacion[1])
+                if cancelado and self.observadores:
+                    self._notificar('cancelado', [evento_id])
+                return cancelado
             except Exception as e:
                 print(f"Error cancelando evento: {e}")
                 return False
             finally:
                 cursor.close()
                 connection.close()
-        return False
\ No newline at end of file
+        return False
+    
+    def cancelar_serie(self, serie_id: int, telegram_id: int) -> int:
+        """Cancelar las ocurrencias futuras de una serie; devuelve cuántas se cancelaron"""
+        connection = self.db.get_connection()
+        if connection:
+            cursor = connection.cursor()
+            try:
+                ids = []
+                if self.observadores:
+                    cursor.execute("""
+                        SELECT id FROM eventos
+                        WHERE serie_id = %s AND usuario_telegram_id = %s
+                        AND estado = 'reservado' AND fecha >= CURDATE()
+                    """, (serie_id, telegram_id))
+                    ids = [fila[0] for fila in cursor.fetchall()]
+                cursor.execute("""
+                    UPDATE eventos
+                    SET estado = 'cancelado'
+                    WHERE serie_id = %s AND usuario_telegram_id = %s
+                    AND estado = 'reservado' AND fecha >= CURDATE()
+                """, (serie_id, telegram_id))
+                connection.commit()
+                cancelados = cursor.rowcount
+                if cancelados > 0 and ids:
+                    self._notificar('cancelado', ids)
+                if cancelados > 0:
+                    cursor.execute("SELECT auditorio_id FROM series WHERE id = %s", (serie_id,))
+                    for (auditorio_id,) in cursor.fetchall():
+                        self.versiones.incrementar(auditorio_id)
+                    if self.indice is not None:
+                        self.indice.invalidar()
+                return cancelados
+            except Exception as e:
+                print(f"Error cancelando serie: {e}")
+                return 0
+            finally:
+                cursor.close()
+                connection.close()
+        return 0
+
+    def obtener_recordatorios_pendientes(self, desde: datetime, hasta: datetime, despues_de=None,
+                                         limite: int = 500) -> List[Evento]:
+        """
+        Reservas sin recordatorio enviado que empiezan en [desde, hasta), ordenadas
+        por (fecha, hora_inicio, id). `despues_de` es la última (fecha, hora, id) de
+        la página anterior. Recorre idx_eventos_recordatorio por rango.
+        """
+        condiciones = [
+            "estado = 'reservado'", "recordatorio_enviado = FALSE",
+            "fecha BETWEEN %s AND %s",
+            "(fecha > %s OR hora_inicio >= %s)",
+            "(fecha < %s OR hora_inicio < %s)"
+        ]
+        valores = [desde.date(), hasta.date(), desde.date(), desde.time(), hasta.date(), hasta.time()]
+        if despues_de:
+            c_fecha, c_hora, c_id = despues_de
+            condiciones.append("(fecha > %s OR (fecha = %s AND (hora_inicio > %s OR (hora_inicio = %s AND id > %s))))")
+            valores += [c_fecha, c_fecha, c_hora, c_hora, c_id]
+        valores.append(limite)
+        
+        connection = self.db.get_connection()
+        eventos = []
+        if connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(f"""
+                    SELECT id, auditorio_id, usuario_telegram_id, nombre_evento, fecha, hora_inicio, hora_fin
+                    FROM eventos
+                    WHERE {' AND '.join(condiciones)}
+                    ORDER BY fecha, hora_inicio, id
+                    LIMIT %s
+                """, tuple(valores))
+                for row in cursor.fetchall():
+                    fecha = datetime(row[4].year, row[4].month, row[4].day)
+                    eventos.append(Evento(
+                        id=row[0],
+                        auditorio_id=row[1],
+                        usuario_telegram_id=row[2],
+                        nombre_evento=row[3],
+                        fecha=fecha,
+                        hora_inicio=datetime.combine(fecha.date(), to_time(row[5])),
+                        hora_fin=datetime.combine(fecha.date(), to_time(row[6]))
+                    ))
+            except Exception as e:
+                print(f"Error obteniendo recordatorios pendientes: {e}")
+            finally:
+                cursor.close()
+                connection.close()
+        return eventos
+    
+    def marcar_recordatorio_enviado(self, evento_id: int) -> bool:
+        """
+        Reclamar el envío del recordatorio: solo una llamada devuelve True por evento,
+        y ninguna si la reserva ya fue cancelada.
+        """
+        connection = self.db.get_connection()
+        if connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("""
+                    UPDATE eventos
+                    SET recordatorio_enviado = TRUE
+                    WHERE id = %s AND estado = 'reservado' AND recordatorio_enviado = FALSE
+                """, (evento_id,))
+                connection.commit()
+                return cursor.rowcount > 0
+            except Exception as e:
+                print(f"Error marcando recordatorio: {e}")
+                return False
+            finally:
+                cursor.close()
+                connection.close()
+        return False
+
+@REGISTRO.recolector
+def _metricas_cache():
+    familias = []
+    cache = AuditorioRepository.cache.info()
+    for clave in ('hits', 'misses', 'evictions', 'invalidations'):
+        familias.append((f'auditorios_cache_catalogo_{clave}_total', 'counter',
+                         f'Caché del catálogo de auditorios: {clave}', [({}, cache[clave])]))
+    familias.append(('auditorios_cache_catalogo_entradas', 'gauge',
+                     'Entradas en la caché del catálogo', [({}, cache['size'])]))
+    if EventoRepository.indice is not None:
+        indice = EventoRepository.indice.info()
+        familias.append(('auditorios_indice_disponibilidad_dias', 'gauge',
+                         'Días cargados en el índice de disponibilidad', [({}, indice['dias'])]))
+        familias.append(('auditorios_indice_disponibilidad_consultas_total', 'counter',
+                         'Consultas al índice de disponibilidad',
+                         [({'resultado': 'hit'}, indice['hits']), ({'resultado': 'miss'}, indice['misses'])]))
+    return familias
\ No newline at end of file
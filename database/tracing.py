@@ -0,0 +1,230 @@
+"""
+Trazas de las sentencias SQL ejecutadas por los repositorios.
+
+Cada cursor entregado por el pool se envuelve en CursorTrazado, que mide cada
+sentencia (ejecución + lectura de filas) y:
+- la registra en el histograma auditorios_sql_duracion_segundos por huella,
+- la entrega a los hooks registrados con agregar_hook(),
+- si supera SQL_LENTA_MS, la escribe como JSON en el log de consultas lentas
+  (con EXPLAIN opcional para los SELECT si SQL_EXPLAIN=true).
+
+El origen (handler del bot o endpoint de la API) se toma de una ContextVar que
+fijan los handlers con origen(); el executor de base de datos copia el contexto
+al hilo que ejecuta la consulta.
+"""
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from .metrics import REGISTRO
+
+SQL_TRAZAS = os.getenv('SQL_TRAZAS', 'true').lower() in ('1', 'true', 'yes')
+SQL_LENTA_MS = float(os.getenv('SQL_LENTA_MS', '200'))
+SQL_EXPLAIN = os.getenv('SQL_EXPLAIN', 'false').lower() in ('1', 'true', 'yes')
+SQL_REDACTAR_PARAMS = os.getenv('SQL_REDACTAR_PARAMS', 'true').lower() in ('1', 'true', 'yes')
+
+SQL_DURACION = REGISTRO.histograma(
+    'auditorios_sql_duracion_segundos',
+    'Duración de las sentencias SQL por huella',
+    ('consulta', 'resultado')
+)
+
+_origen = contextvars.ContextVar('origen_sql', default=None)
+_hooks = []
+
+def _crear_log() -> logging.Logger:
+    log = logging.getLogger('auditorios.sql')
+    if not log.handlers:
+        path = os.getenv('SQL_LOG_PATH')
+        handler = logging.FileHandler(path, encoding='utf-8') if path else logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        log.addHandler(handler)
+        log.setLevel(logging.INFO)
+        log.propagate = False
+    return log
+
+log_lentas = _crear_log()
+
+@contextmanager
+def origen(nombre: str):
+    """Marcar las consultas ejecutadas dentro del bloque con el handler o endpoint que las originó"""
+    token = _origen.set(nombre)
+    try:
+        yield
+    finally:
+        _origen.reset(token)
+
+def agregar_hook(funcion):
+    """Registrar una función que recibe la traza (dict) de cada sentencia ejecutada"""
+    _hooks.append(funcion)
+    return funcion
+
+_LITERALES = re.compile(r"'(?:[^'\\]|\\.)*'|\b\d+(?:\.\d+)?\b|%s")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ESPACIOS = re.compile(r"\s+")
+# Grupos entre paréntesis repetidos: VALUES (...), (...) o (a = ? AND b = ?) OR (a = ? AND b = ?)
+_REPETIDOS = re.compile(r"(\([^()]*\))(?:\s*(?:,|\bOR\b)\s*\1)+")
+
+@lru_cache(maxsize=1024)
+def huella(sql: str):
+    """Sentencia normalizada (literales y parámetros como ?) y su identificador corto"""
+    normalizada = _ESPACIOS.sub(' ', sql).strip()
+    normalizada = _LITERALES.sub('?', normalizada)
+    normalizada = _LISTAS.sub('(...)', normalizada)
+    # Los lotes de distinto tamaño comparten huella (acota las etiquetas del histograma)
+    normalizada = _REPETIDOS.sub(r'\1+', normalizada)
+    return normalizada, hashlib.sha1(normalizada.encode('utf-8')).hexdigest()[:10]
+
+def _redactar(params):
+    if params is None:
+        return None
+    if SQL_REDACTAR_PARAMS:
+        return [type(p).__name__ for p in params]
+    return [p if isinstance(p, (int, float, str, type(None))) else str(p) for p in params]
+
+def _llamador() -> str:
+    """Primer marco fuera de este módulo (normalmente el método del repositorio)"""
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+    if frame is None:
+        return None
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}"
+
+class CursorTrazado:
+    """Envoltura de un cursor de mysql.connector que mide cada sentencia"""
+    
+    def __init__(self, cursor, connection):
+        self._cursor = cursor
+        self._connection = connection
+        self._sql = None
+        self._lentas = []
+    
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+    
+    def __iter__(self):
+        return iter(self.fetchall())
+    
+    def _ejecutar(self, metodo, operation, params, multi=False):
+        self._finalizar()
+        self._sql = operation
+        self._params = params
+        self._multi = multi
+        self._filas = 0
+        self._lecturas = False
+        self._error = None
+        inicio = time.perf_counter()
+        try:
+            return metodo(operation, params) if params is not None else metodo(operation)
+        except Exception as e:
+            self._error = e
+            raise
+        finally:
+            self._duracion = time.perf_counter() - inicio
+            if self._error is not None:
+                self._finalizar()
+    
+    def execute(self, operation, params=None, *args, **kwargs):
+        return self._ejecutar(self._cursor.execute, operation, params)
+    
+    def executemany(self, operation, seq_params):
+        seq_params = list(seq_params)
+        return self._ejecutar(self._cursor.executemany, operation, seq_params, multi=True)
+    
+    def _leer(self, metodo, *args):
+        inicio = time.perf_counter()
+        try:
+            return metodo(*args)
+        finally:
+            self._duracion += time.perf_counter() - inicio
+            self._lecturas = True
+    
+    def fetchone(self):
+        fila = self._leer(self._cursor.fetchone)
+        if fila is not None:
+            self._filas += 1
+        return fila
+    
+    def fetchmany(self, size=1):
+        filas = self._leer(self._cursor.fetchmany, size)
+        self._filas += len(filas)
+        return filas
+    
+    def fetchall(self):
+        filas = self._leer(self._cursor.fetchall)
+        self._filas += len(filas)
+        return filas
+    
+    def _finalizar(self):
+        """Cerrar la traza de la sentencia en curso"""
+        sql = self._sql
+        if sql is None:
+            return
+        self._sql = None
+        
+        normalizada, consulta = huella(sql)
+        resultado = 'error' if self._error is not None else 'ok'
+        SQL_DURACION.observar(self._duracion, consulta, resultado)
+        
+        lenta = self._duracion * 1000 >= SQL_LENTA_MS
+        if not (lenta or _hooks):
+            return
+        
+        filas = self._filas if self._lecturas else getattr(self._cursor, 'rowcount', None)
+        traza = {
+            'ts': datetime.now().isoformat(timespec='milliseconds'),
+            'consulta': consulta,
+            'sql': normalizada,
+            'params': f"{len(self._params)} filas" if self._multi else _redactar(self._params),
+            'filas': filas,
+            'duracion_ms': round(self._duracion * 1000, 3),
+            'origen': _origen.get(),
+            'llamador': _llamador(),
+            'resultado': resultado
+        }
+        if self._error is not None:
+            traza['error'] = str(self._error)
+        
+        for hook in _hooks:
+            try:
+                hook(traza)
+            except Exception as e:
+                print(f"Error en hook de trazas SQL: {e}")
+        
+        if lenta:
+            self._lentas.append((traza, sql, self._params))
+    
+    def _explain(self, sql, params):
+        cursor = self._connection.cursor()
+        try:
+            if params is not None:
+                cursor.execute("EXPLAIN " + sql, params)
+            else:
+                cursor.execute("EXPLAIN " + sql)
+            columnas = [c[0] for c in cursor.description]
+            return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+        finally:
+            cursor.close()
+    
+    def close(self):
+        self._finalizar()
+        resultado = self._cursor.close()
+        
+        # EXPLAIN y log al cerrar: los resultados pendientes ya se consumieron
+        for traza, sql, params in self._lentas:
+            if SQL_EXPLAIN and traza['resultado'] == 'ok' and sql.lstrip().upper().startswith('SELECT'):
+                try:
+                    traza['explain'] = self._explain(sql, params)
+                except Exception as e:
+                    traza['explain_error'] = str(e)
+            log_lentas.info(json.dumps(traza, ensure_ascii=False, default=str))
+        self._lentas = []
+        return resultado
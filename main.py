@@ -3,7 +3,10 @@ import asyncio
 from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters
 from dotenv import load_dotenv
 from database.connection import DatabaseConnection
+from database.repositories import AuditorioRepository
+from database import metrics
 from bot.handlers import TelegramBot
+from bot.update_processor import PerUserUpdateProcessor
 
 load_dotenv()
 
@@ -21,20 +24,71 @@ def main():
         print("Error: BOT_TOKEN no encontrado en las variables de entorno")
         return
     
-    # Crear aplicación
-    app = Application.builder().token(bot_token).build()
-    
     # Inicializar handlers
     telegram_bot = TelegramBot()
     
+    # Crear aplicación (procesa varias actualizaciones en paralelo, en orden por usuario)
+    concurrent_updates = int(os.getenv('BOT_CONCURRENT_UPDATES', '16'))
+    processor = PerUserUpdateProcessor(concurrent_updates)
+    # Todas las solicitudes a Telegram pasan por la cola de envíos (prioridades y límites de la API)
+    app = Application.builder().token(bot_token).concurrent_updates(
+        processor
+    ).rate_limiter(telegram_bot.envios).post_init(
+        telegram_bot.post_init
+    ).post_shutdown(telegram_bot.post_shutdown).build()
+    
+    # Exponer métricas del bot (GET /metrics) si se configuró un puerto
+    metrics_port = os.getenv('METRICS_PORT')
+    if metrics_port:
+        metrics.REGISTRO.recolector(lambda: [
+            ('auditorios_bot_actualizaciones_en_cola', 'gauge', 'Actualizaciones pendientes de procesar',
+             [({}, processor.info()['actualizaciones_en_cola'])]),
+            ('auditorios_bot_envios_en_cola', 'gauge', 'Solicitudes a Telegram pendientes en la cola de envíos',
+             [({}, telegram_bot.envios.info()['pendientes'])]),
+            *metricas_estados(telegram_bot.user_states)
+        ])
+        metrics.iniciar_servidor(int(metrics_port))
+        print(f"📈 Métricas disponibles en el puerto {metrics_port} (/metrics)")
+    
     # Agregar handlers
     app.add_handler(CommandHandler("start", telegram_bot.start))
     app.add_handler(CallbackQueryHandler(telegram_bot.button_callback))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, telegram_bot.handle_message))
     
     # Iniciar bot
-    print("🤖 Bot iniciado correctamente...")
-    app.run_polling(allowed_updates=["message", "callback_query"])
+    modo = os.getenv('BOT_MODO', 'polling').lower()
+    if modo == 'webhook':
+        webhook_url = os.getenv('WEBHOOK_URL')
+        if not webhook_url:
+            print("Error: WEBHOOK_URL es obligatorio en modo webhook")
+            return
+        url_path = os.getenv('WEBHOOK_PATH', 'telegram')
+        print(f"🤖 Bot iniciado en modo webhook ({concurrent_updates} actualizaciones en paralelo)...")
+        app.run_webhook(
+            listen=os.getenv('WEBHOOK_LISTEN', '0.0.0.0'),
+            port=int(os.getenv('WEBHOOK_PORT', '8443')),
+            url_path=url_path,
+            webhook_url=f"{webhook_url.rstrip('/')}/{url_path}",
+            secret_token=os.getenv('WEBHOOK_SECRET'),
+            max_connections=int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40')),
+            allowed_updates=["message", "callback_query"]
+        )
+    else:
+        print(f"🤖 Bot iniciado correctamente ({concurrent_updates} actualizaciones en paralelo)...")
+        app.run_polling(allowed_updates=["message", "callback_query"])
+
+def metricas_estados(estados):
+    """Tamaño, desalojos y expiraciones del almacén de estados de conversación"""
+    info = estados.info()
+    etiquetas = {'backend': info['backend']}
+    return [
+        ('auditorios_bot_estados', 'gauge', 'Conversaciones guardadas en el almacén de estados',
+         [(etiquetas, info['size'])]),
+        ('auditorios_bot_estados_desalojados_total', 'counter', 'Conversaciones desalojadas por superar ESTADOS_MAX',
+         [(etiquetas, info['evictions'])]),
+        ('auditorios_bot_estados_expirados_total', 'counter', 'Conversaciones descartadas por superar ESTADOS_TTL',
+         [(etiquetas, info['expirations'])])
+    ]
 
 def insert_sample_data():
     """Insertar datos de ejemplo en la base de datos"""
@@ -62,6 +116,7 @@ def insert_sample_data():
                 auditorios_ejemplo
             )
             connection.commit()
+            AuditorioRepository.invalidar_cache()
             print("✅ Auditorios de ejemplo insertados")
         
         cursor.close()